@@ -1,24 +1,28 @@
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from allauth.account.adapter import DefaultAccountAdapter
 from django.contrib.auth.models import User
+from core.identifiers import next_available, save_unique
 
 
-class CustomAccountAdapter(DefaultAccountAdapter):
-    def save_user(self, request, user, form, commit=True):
-        user = super().save_user(request, user, form, commit=False)
+def email_username(email):
+    return email.split('@')[0]
 
-        if not user.username and user.email:
-            base_username = user.email.split('@')[0]
-            username = base_username
-            counter = 1
 
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
+def allocate_username(email):
+    max_length = User._meta.get_field('username').max_length
+    return next_available(User.objects.all(), 'username', email_username(email), '', max_length)
 
-            user.username = username
 
-        if commit:
+class CustomAccountAdapter(DefaultAccountAdapter):
+    def save_user(self, request, user, form, commit=True):
+        user = super().save_user(request, user, form, commit=False)
+
+        needs_username = not user.username and user.email
+        if needs_username and commit:
+            save_unique(user, 'username', email_username(user.email), user.save, separator='')
+        elif needs_username:
+            user.username = allocate_username(user.email)
+        elif commit:
             user.save()
         return user
 
@@ -28,14 +32,16 @@ class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
         user = super().populate_user(request, sociallogin, data)
 
         if not user.username and user.email:
-            base_username = user.email.split('@')[0]
-            username = base_username
-            counter = 1
-
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
-
-            user.username = username
+            user.username = allocate_username(user.email)
 
         return user
+
+    def save_user(self, request, sociallogin, form=None):
+        user = sociallogin.user
+        if not user.email:
+            return super().save_user(request, sociallogin, form)
+        # The username picked in populate_user may have been taken since; reallocate on a clash.
+        return save_unique(
+            user, 'username', email_username(user.email),
+            lambda: super(CustomSocialAccountAdapter, self).save_user(request, sociallogin, form),
+            separator='')
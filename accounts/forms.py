@@ -1,4 +1,5 @@
 from django import forms
+from core.images import validate_image_upload
 from .models import Profile
 
 
@@ -14,6 +15,7 @@ class ProfileForm(forms.ModelForm):
 
     avatar_file = forms.ImageField(
         required=False,
+        validators=[validate_image_upload],
         widget=forms.FileInput(attrs={
             'class': 'form-input',
             'accept': 'image/*'
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:35
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_avatar_hash(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    rows = Profile.objects.filter(avatar__isnull=False, avatar_type__isnull=False).only('avatar')
+    for obj in rows.iterator(chunk_size=100):
+        obj.avatar_hash = hashlib.sha256(obj.avatar).hexdigest()
+        obj.save(update_fields=['avatar_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_avatar_type_alter_profile_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_avatar_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Existing avatars are rendered by the migrate_image_blobs command,
+    # outside any migration; 0006 drops the old columns afterwards.
+
+    dependencies = [
+        ('accounts', '0004_profile_updated_at'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = []
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:05
+
+from django.db import migrations
+
+
+def check_avatars_rendered(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        columns = {info.name for info in connection.introspection.get_table_description(cursor, 'accounts_profile')}
+        if 'avatar' not in columns:
+            return
+        cursor.execute('SELECT 1 FROM accounts_profile WHERE avatar IS NOT NULL LIMIT 1')
+        if cursor.fetchone():
+            raise RuntimeError(
+                'Some profiles still store their avatar in accounts_profile. '
+                'Run "python manage.py migrate_image_blobs" before migrating.'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_avatar_renditions'),
+        ('core', '0002_rendition_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_avatars_rendered, migrations.RunPython.noop),
+        # IF EXISTS: databases migrated before the conversion moved out of 0005 already dropped them.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE accounts_profile DROP COLUMN IF EXISTS avatar, DROP COLUMN IF EXISTS avatar_type',
+                    'ALTER TABLE accounts_profile ADD COLUMN avatar bytea NULL, ADD COLUMN avatar_type varchar(50) NULL',
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='profile',
+                    name='avatar',
+                ),
+                migrations.RemoveField(
+                    model_name='profile',
+                    name='avatar_type',
+                ),
+            ],
+        ),
+    ]
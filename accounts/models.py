@@ -1,18 +1,29 @@
 from django.db import models
-import base64
+from core.images import rendition_srcset, rendition_url, store_renditions
 
 
 class Profile(models.Model):
     user = models.OneToOneField('auth.User', on_delete=models.CASCADE)
     bio = models.TextField(blank=True)
-    avatar = models.BinaryField(blank=True, null=True)
-    avatar_type = models.CharField(max_length=50, blank=True, null=True)
+    avatar_hash = models.CharField(max_length=64, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
-    def get_avatar_data_url(self):
-        if self.avatar and self.avatar_type:
-            base64_data = base64.b64encode(self.avatar).decode('utf-8')
-            return f"data:{self.avatar_type};base64,{base64_data}"
+    def set_avatar(self, upload):
+        self.avatar_hash = store_renditions(upload, 'avatar')
+
+    @property
+    def has_avatar(self):
+        return bool(self.avatar_hash)
+
+    def get_avatar_url(self):
+        if self.avatar_hash:
+            return rendition_url(self.avatar_hash, 'avatar')
         return None
+
+    def get_avatar_srcset(self):
+        if self.avatar_hash:
+            return rendition_srcset(self.avatar_hash, 'avatar')
+        return ''
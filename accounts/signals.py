@@ -0,0 +1,14 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Profile
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Profile.updated_at versions cached author details such as the display name.
+    if created or update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    Profile.objects.filter(user=instance).update(updated_at=timezone.now())
@@ -2,12 +2,15 @@ from django.shortcuts import redirect, get_object_or_404
 from django.contrib.auth import logout as auth_logout, login as auth_login, authenticate
 from django.contrib.auth.models import User
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import InvalidPage
+from django.http import Http404
 from django.views.generic import FormView, View, UpdateView
 from django.urls import reverse
+from core.pagination import CursorPaginator
 from .forms import RegisterForm, LoginForm, ProfileForm
 from .models import Profile
 from blog.models import Post
-from comments.models import Comment
+from dashboard.models import AuthorStats
 
 
 class RegisterView(FormView):
@@ -86,6 +89,7 @@ class UserProfileView(UpdateView):
     model = Profile
     form_class = ProfileForm
     template_name = 'accounts/profile.html'
+    paginate_by = 12
 
     def get_object(self, queryset=None):
         username = self.kwargs.get('username')
@@ -103,18 +107,30 @@ class UserProfileView(UpdateView):
         return (self.request.user.is_authenticated and 
                 self.request.user.username == self.kwargs.get('username'))
 
+    def paginate_posts(self, queryset, cursor_param):
+        try:
+            return CursorPaginator(queryset, self.paginate_by).page(self.request.GET.get(cursor_param))
+        except InvalidPage as e:
+            raise Http404(str(e))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         profile_user = self.get_profile_user()
+        posts = Post.objects.filter(author=profile_user, is_archived=False)
+        archived_posts = Post.objects.filter(author=profile_user, is_archived=True)
+        stats = AuthorStats.for_user(profile_user)
 
         context.update({
             'profile_user': profile_user,
             'profile': self.get_object(),
-            'user_posts': Post.objects.filter(author=profile_user, is_archived=False).order_by('-created_at'),
+            'user_posts': self.paginate_posts(posts.for_cards(), 'posts_cursor'),
+            'user_posts_count': stats.post_count,
             'is_own_profile': self.is_own_profile(),
-            'comment_count': Comment.objects.filter(user=profile_user).count(),
-            'views_count': sum(post.views for post in Post.objects.filter(author=profile_user, is_archived=False).order_by('-created_at')),
-            'user_archived_posts': Post.objects.filter(author=profile_user, is_archived=True).order_by('-created_at'),
+            'comment_count': stats.comments_written,
+            'views_count': stats.total_views,
+            'user_archived_posts': self.paginate_posts(archived_posts.for_cards(), 'archived_cursor'),
+            'user_archived_posts_count': stats.archived_post_count,
+            'active_tab': 'drafts' if 'archived_cursor' in self.request.GET else 'posts',
         })
         return context
 
@@ -132,8 +148,7 @@ class UserProfileView(UpdateView):
         avatar_file = form.cleaned_data.get('avatar_file')
 
         if avatar_file:
-            profile.avatar = avatar_file.read()
-            profile.avatar_type = avatar_file.content_type
+            profile.set_avatar(avatar_file)
 
         profile.save()
 
@@ -150,3 +165,4 @@ class UserProfileView(UpdateView):
         if not self.is_own_profile():
             return redirect('user_profile', username=self.kwargs.get('username'))
         return super().post(request, *args, **kwargs)
+
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_counter_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('counters', {}).get('BACKEND', '')
+    if backend.endswith('RedisCache'):
+        return []
+    return [Warning(
+        f'The "counters" cache uses {backend or "no backend"}.',
+        hint=(
+            'Buffered view counts reach the database only from this cache, so it must be shared by '
+            'every worker and must not evict entries. Set COUNTER_CACHE_BACKEND to '
+            'django.core.cache.backends.redis.RedisCache.'
+        ),
+        id='blog.W001',
+    )]
@@ -1,4 +1,5 @@
 from django import forms
+from core.images import validate_image_upload
 from .models import Category, Tag
 
 
@@ -34,6 +35,7 @@ class BlogPostForm(forms.Form):
     cover_image = forms.ImageField(
         label='Cover Image',
         required=False,
+        validators=[validate_image_upload],
         widget=forms.FileInput(attrs={
             'class': 'form-file-input',
             'accept': 'image/*'
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Store word_count and read_minutes for posts that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every post, not only rows missing the stored values.')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.only('id', 'content').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(word_count__isnull=True)
+
+        updated = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                post.update_reading_stats()
+            Post.objects.bulk_update(batch, ['word_count', 'read_minutes'])
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Updated {updated} posts...')
+
+        self.stdout.write(self.style.SUCCESS(f'Stored reading stats for {updated} posts.'))
@@ -0,0 +1,101 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog.models import Post
+from blog.search import post_search_vector, search_posts
+
+TOPIC_WORDS = [
+    'django', 'postgres', 'python', 'caching', 'database', 'index', 'query', 'planner',
+    'template', 'migration', 'deployment', 'docker', 'security', 'testing', 'design',
+    'performance', 'latency', 'javascript', 'frontend', 'markdown',
+]
+
+QUERIES = [
+    'postgres',
+    'django caching',
+    '"query planner"',
+    'python -javascript',
+    'latency or throughput',
+    'nonexistentterm',
+]
+
+
+def synthetic_vocabulary(rng, size=5000):
+    syllables = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'qu', 'dre', 'sto', 'lin']
+    return [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def synthetic_text(rng, vocabulary, words):
+    return ' '.join(
+        rng.choice(TOPIC_WORDS) if rng.random() < 0.003 else rng.choice(vocabulary)
+        for _ in range(words)
+    )
+
+
+class Command(BaseCommand):
+    help = 'Measure blog search latency against a synthetic corpus (rolled back afterwards).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--explain', action='store_true', help='Print EXPLAIN ANALYZE for each query.')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated posts.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_corpus(options)
+            for query in QUERIES:
+                self.benchmark(query, options)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def create_corpus(self, options):
+        rng = random.Random(options['seed'])
+        vocabulary = synthetic_vocabulary(rng)
+        author, _ = User.objects.get_or_create(username='search-benchmark')
+
+        started = time.perf_counter()
+        created = 0
+        while created < options['posts']:
+            size = min(options['batch_size'], options['posts'] - created)
+            Post.objects.bulk_create(
+                Post(
+                    author=author,
+                    title=synthetic_text(rng, vocabulary, rng.randint(4, 8)).title(),
+                    excerpt=synthetic_text(rng, vocabulary, 25),
+                    content=synthetic_text(rng, vocabulary, rng.randint(150, 400)),
+                    slug=f'search-benchmark-{created + i}',
+                )
+                for i in range(size)
+            )
+            created += size
+        Post.objects.filter(author=author).update(search_vector=post_search_vector())
+        with connection.cursor() as cursor:
+            # Merge the GIN pending list filled by the bulk update, as VACUUM would.
+            cursor.execute("SELECT gin_clean_pending_list('blog_post_search_gin')")
+            cursor.execute('ANALYZE blog_post')
+        self.stdout.write(f'Indexed {created} posts in {time.perf_counter() - started:.1f}s.')
+
+    def benchmark(self, query, options):
+        queryset = search_posts(Post.objects.for_cards().filter(is_archived=False), query)
+        timings = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            matches = queryset.count()
+            list(queryset[:12])
+            timings.append((time.perf_counter() - started) * 1000)
+
+        p95 = statistics.quantiles(timings, n=20, method='inclusive')[-1] if len(timings) > 1 else timings[0]
+        self.stdout.write(
+            f'{query!r:28} {matches:>7} matches  '
+            f'median {statistics.median(timings):7.1f} ms  p95 {p95:7.1f} ms  max {max(timings):7.1f} ms'
+        )
+        if options['explain']:
+            self.stdout.write(queryset[:12].explain(analyze=True))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from blog.view_counts import flush_views, requeue_pending
+
+
+class Command(BaseCommand):
+    help = 'Write buffered post view counts from the cache to the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--requeue', action='store_true',
+            help='First queue every post with buffered views, recovering any whose queue entry was lost. '
+                 'Reads every post id.')
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            queued = requeue_pending(batch_size=options['batch_size'])
+            self.stdout.write(f'Queued {queued} posts.')
+        flushed = flush_views(batch_size=options['batch_size'])
+        if flushed is None:
+            self.stdout.write(self.style.WARNING('Another flush is already running.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} views.'))
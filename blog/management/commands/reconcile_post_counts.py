@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Category, Post, Tag
+
+
+def count_published(lookup):
+    return Coalesce(Subquery(
+        Post.objects.filter(is_archived=False, **{lookup: OuterRef('pk')})
+        .order_by()
+        .values(lookup)
+        .annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in the denormalized Category.post_count and Tag.post_count columns.'
+
+    def handle(self, *args, **options):
+        categories = self.reconcile(Category, 'category')
+        tags = self.reconcile(Tag, 'tags')
+        self.stdout.write(self.style.SUCCESS(
+            f'Fixed post counts on {categories} categories and {tags} tags.'))
+
+    def reconcile(self, model, lookup):
+        post_count = count_published(lookup)
+        return (
+            model.objects.annotate(actual=post_count)
+            .exclude(post_count=F('actual'))
+            .update(post_count=post_count)
+        )
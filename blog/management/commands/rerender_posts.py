@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.utils import MARKDOWN_RENDER_VERSION
+
+
+class Command(BaseCommand):
+    help = 'Re-render stored post HTML after the Markdown configuration changes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-render every post, not only posts rendered with an older version.')
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.only('id', 'content').order_by('pk')
+        if not options['all']:
+            queryset = queryset.exclude(content_html_version=MARKDOWN_RENDER_VERSION)
+
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                post.render_content()
+            Post.objects.bulk_update(batch, ['content_html', 'content_html_version'])
+            rendered += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Rendered {rendered} posts...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rendered {rendered} posts with version {MARKDOWN_RENDER_VERSION}.'))
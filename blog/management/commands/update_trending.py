@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.trending import update_trending_scores
+from core.page_cache import bump_page_generation
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores for recent and currently trending posts.'
+
+    def handle(self, *args, **options):
+        changed = update_trending_scores()
+        if changed:
+            bump_page_generation()
+        self.stdout.write(self.style.SUCCESS(f'Updated trending scores on {changed} posts.'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:35
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_cover_image_hash(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    rows = Post.objects.filter(cover_image__isnull=False, cover_image_type__isnull=False).only('cover_image')
+    for obj in rows.iterator(chunk_size=100):
+        obj.cover_image_hash = hashlib.sha256(obj.cover_image).hexdigest()
+        obj.save(update_fields=['cover_image_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_is_archived'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='cover_image_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_cover_image_hash, migrations.RunPython.noop),
+    ]
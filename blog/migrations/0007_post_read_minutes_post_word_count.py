@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_cover_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='read_minutes',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
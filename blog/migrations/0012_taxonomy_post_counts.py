@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:58
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_post_counts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    published = Post.objects.filter(is_archived=False).order_by()
+    for model_name, lookup in (('Category', 'category'), ('Tag', 'tags')):
+        model = apps.get_model('blog', model_name)
+        counts = (
+            published.filter(**{lookup: OuterRef('pk')})
+            .values(lookup)
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        model.objects.update(post_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', 'is_archived', '-created_at'], name='blog_post_category_listing'),
+        ),
+        migrations.RunPython(backfill_post_counts, migrations.RunPython.noop),
+        # The through table only has (post_id, tag_id); tag filters start from the tag side.
+        migrations.RunSQL(
+            'CREATE INDEX blog_post_tags_tag_post ON blog_post_tags (tag_id, post_id);',
+            'DROP INDEX blog_post_tags_tag_post;',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:06
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def dedupe_slugs(apps, schema_editor):
+    # The oldest post keeps its slug; later duplicates and blank slugs get a free suffix.
+    Post = apps.get_model('blog', 'Post')
+    taken = set(Post.objects.values_list('slug', flat=True))
+    kept = set()
+    for post in Post.objects.order_by('pk').only('pk', 'slug', 'title').iterator():
+        if post.slug and post.slug not in kept:
+            kept.add(post.slug)
+            continue
+        base = (post.slug or slugify(post.title) or 'post')[:190]
+        slug, counter = base, 1
+        while slug in taken:
+            slug = f'{base}-{counter}'
+            counter += 1
+        taken.add(slug)
+        kept.add(slug)
+        Post.objects.filter(pk=post.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, unique=True),
+        ),
+    ]
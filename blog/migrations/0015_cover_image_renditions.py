@@ -0,0 +1,15 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Existing cover images are rendered by the migrate_image_blobs command,
+    # outside any migration; 0019 drops the old columns afterwards.
+
+    dependencies = [
+        ('blog', '0014_unique_post_slug'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = []
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_cover_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostVisitorSketch',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='visitor_sketch', serialize=False, to='blog.post')),
+                ('registers', models.BinaryField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='unique_visitors',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
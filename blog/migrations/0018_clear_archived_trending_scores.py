@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+def clear_archived_scores(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(is_archived=True, trending_score__gt=0).update(trending_score=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_post_trending_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_archived_scores, migrations.RunPython.noop),
+    ]
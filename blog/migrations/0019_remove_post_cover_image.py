@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:05
+
+from django.db import migrations
+
+
+def check_covers_rendered(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        columns = {info.name for info in connection.introspection.get_table_description(cursor, 'blog_post')}
+        if 'cover_image' not in columns:
+            return
+        cursor.execute('SELECT 1 FROM blog_post WHERE cover_image IS NOT NULL LIMIT 1')
+        if cursor.fetchone():
+            raise RuntimeError(
+                'Some posts still store their cover image in blog_post. '
+                'Run "python manage.py migrate_image_blobs" before migrating.'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_clear_archived_trending_scores'),
+        ('core', '0002_rendition_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_covers_rendered, migrations.RunPython.noop),
+        # IF EXISTS: databases migrated before the conversion moved out of 0015 already dropped them.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE blog_post DROP COLUMN IF EXISTS cover_image, DROP COLUMN IF EXISTS cover_image_type',
+                    'ALTER TABLE blog_post ADD COLUMN cover_image bytea NULL, ADD COLUMN cover_image_type varchar(50) NULL',
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='post',
+                    name='cover_image',
+                ),
+                migrations.RemoveField(
+                    model_name='post',
+                    name='cover_image_type',
+                ),
+            ],
+        ),
+    ]
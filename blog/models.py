@@ -1,8 +1,18 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
+from django.utils.safestring import mark_safe
 from django.utils.text import slugify
+from core.identifiers import save_unique
+from core.images import rendition_srcset, rendition_url, store_renditions
+from .search import post_search_vector
+from .utils import MARKDOWN_RENDER_VERSION, count_words, estimate_read_time, render_markdown
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
+    # Published (non-archived) posts, maintained by blog.signals.
+    post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -10,55 +20,184 @@ class Category(models.Model):
 
 class Tag(models.Model):
     name = models.CharField(max_length=50)
+    post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
 
 
+class PostQuerySet(models.QuerySet):
+    def with_relations(self):
+        return (
+            self.select_related('author', 'author__profile', 'category')
+            .prefetch_related('tags')
+            .defer('content', 'search_vector')
+        )
+
+    def for_cards(self):
+        return self.with_relations().defer('content_html')
+
+    def for_detail(self):
+        return self.with_relations()
+
+    def with_tags(self, tag_ids, match_all=False):
+        # EXISTS probes stay on the through-table indexes and never duplicate rows.
+        tagged = self.model.tags.through.objects.filter(post_id=models.OuterRef('pk'))
+        if not match_all:
+            return self.filter(models.Exists(tagged.filter(tag_id__in=tag_ids)))
+        queryset = self
+        for tag_id in tag_ids:
+            queryset = queryset.filter(models.Exists(tagged.filter(tag_id=tag_id)))
+        return queryset
+
+    def touch(self):
+        return self.update(updated_at=timezone.now())
+
+
 class Post(models.Model):
-    author = models.ForeignKey('auth.User', on_delete=models.CASCADE)
+    # The author and category FK indexes are covered by the listing indexes in Meta.
+    author = models.ForeignKey('auth.User', on_delete=models.CASCADE, db_index=False)
     title = models.CharField(max_length=200)
     excerpt = models.TextField(blank=True, null=True)
     content = models.TextField()
+    content_html = models.TextField(blank=True, default='')
+    content_html_version = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     category = models.ForeignKey(
-        Category, on_delete=models.SET_NULL, null=True, related_name='posts')
+        Category, on_delete=models.SET_NULL, null=True, related_name='posts', db_index=False)
     tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
-    cover_image = models.BinaryField(blank=True, null=True)
-    cover_image_type = models.CharField(max_length=50, blank=True, null=True)
-    slug = models.SlugField(max_length=200, blank=True, db_index=True, default='')
+    cover_image_hash = models.CharField(max_length=64, blank=True, null=True)
+    slug = models.SlugField(max_length=200, blank=True, unique=True)
     views = models.PositiveIntegerField(default=0)
+    # Approximate distinct readers, estimated from PostVisitorSketch.
+    unique_visitors = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Recent activity with age decay, refreshed by the update_trending command.
+    trending_score = models.FloatField(default=0)
     is_archived = models.BooleanField(default=False)
+    word_count = models.PositiveIntegerField(blank=True, null=True)
+    read_minutes = models.PositiveSmallIntegerField(blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='blog_post_search_gin'),
+            models.Index(fields=['category', 'is_archived', '-created_at'], name='blog_post_category_listing'),
+            models.Index(fields=['author', 'is_archived', '-created_at', '-id'], name='blog_post_author_listing'),
+            models.Index(
+                fields=['-created_at', '-id'], name='blog_post_published_recent',
+                condition=models.Q(is_archived=False)),
+            models.Index(
+                fields=['-trending_score', '-created_at'], name='blog_post_published_trending',
+                condition=models.Q(is_archived=False)),
+        ]
 
     def __str__(self):
         return self.title
     
+    # Loaded values kept so save() and signal receivers can tell what changed.
+    tracked_fields = ('title', 'excerpt', 'content', 'category_id', 'is_archived')
+    search_fields = ('title', 'excerpt', 'content')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.tracked_fields
+        }
+        return instance
+
+    def get_loaded_value(self, field_name, default=None):
+        return getattr(self, '_loaded_values', {}).get(field_name, default)
+
+    def content_changed(self):
+        if 'content' in self.get_deferred_fields():
+            return False
+        return self.content != self.get_loaded_value('content')
+
+    def search_fields_changed(self):
+        deferred = self.get_deferred_fields()
+        return any(
+            getattr(self, name) != self.get_loaded_value(name)
+            for name in self.search_fields if name not in deferred
+        )
+
+    def update_reading_stats(self):
+        self.word_count = count_words(self.content)
+        self.read_minutes = estimate_read_time(self.word_count)
+
+    def render_content(self):
+        self.content_html = render_markdown(self.content)
+        self.content_html_version = MARKDOWN_RENDER_VERSION
+
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
-            original_slug = self.slug
-            counter = 1
-            while Post.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+            return save_unique(
+                self, 'slug', slugify(self.title) or 'post', lambda: self.save(*args, **kwargs))
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        if self.is_archived and (update_fields is None or 'is_archived' in update_fields):
+            # update_trending skips archived posts, so a kept score would return with an unarchive.
+            self.trending_score = 0
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'trending_score'}
+        reindex = (
+            update_fields is None or set(update_fields) & set(self.search_fields)
+        ) and self.search_fields_changed()
+        if (update_fields is None or 'content' in update_fields) and self.content_changed():
+            self.update_reading_stats()
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'word_count', 'read_minutes', 'content_html', 'content_html_version'}
+
         super().save(*args, **kwargs)
+        if reindex:
+            # The vector is built from the stored columns, so it is written after the row.
+            Post.objects.filter(pk=self.pk).update(search_vector=post_search_vector())
+            # Mark the stale in-memory value deferred so later saves leave the column alone.
+            self.__dict__.pop('search_vector', None)
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            name: getattr(self, name) for name in self.tracked_fields if name not in deferred
+        }
+
+    def set_cover_image(self, upload):
+        self.cover_image_hash = store_renditions(upload, 'cover')
+
+    @property
+    def has_cover(self):
+        return bool(self.cover_image_hash)
 
-    def get_cover_image_data_url(self):
-        if self.cover_image and self.cover_image_type:
-            import base64
-            base64_data = base64.b64encode(self.cover_image).decode('utf-8')
-            return f"data:{self.cover_image_type};base64,{base64_data}"
+    def get_cover_image_url(self):
+        if self.cover_image_hash:
+            return rendition_url(self.cover_image_hash, 'cover')
         return None
+
+    def get_cover_image_srcset(self):
+        if self.cover_image_hash:
+            return rendition_srcset(self.cover_image_hash, 'cover')
+        return ''
     
+    @property
+    def rendered_content(self):
+        if self.content_html_version == MARKDOWN_RENDER_VERSION:
+            return mark_safe(self.content_html)
+        return mark_safe(render_markdown(self.content))
+
     @property
     def read_time(self):
-        import re
-        text = re.sub(r'```[\s\S]*?```', '', self.content) 
-        text = re.sub(r'`[^`]+`', '', text) 
-        text = re.sub(r'#+ ', '', text)
-        text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-        text = re.sub(r'[*_~`]', '', text) 
-        
-        word_count = len(text.split())
-        read_time = max(1, round(word_count / 200)) 
-        return read_time
+        if self.read_minutes is not None:
+            return self.read_minutes
+        return estimate_read_time(count_words(self.content))
+
+
+class PostVisitorSketch(models.Model):
+    # Kept out of blog_post so the HyperLogLog registers never widen listing scans.
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='visitor_sketch')
+    registers = models.BinaryField()
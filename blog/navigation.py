@@ -0,0 +1,50 @@
+import time
+
+from django.core.cache import cache
+
+from .models import Category, Tag
+
+VERSION_KEY = 'navigation:version'
+NAVIGATION_TIMEOUT = 60 * 60
+
+# (version, data) for this process; checked against the shared version key.
+_local = (None, None)
+
+
+def navigation_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost key never brings back an old version.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_navigation():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def build_navigation():
+    return {
+        'categories': list(Category.objects.order_by('name')),
+        'tags': list(Tag.objects.order_by('name')),
+    }
+
+
+def get_navigation():
+    global _local
+    version = navigation_version()
+    local_version, data = _local
+    if local_version == version:
+        return data
+
+    key = f'navigation:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = build_navigation()
+        cache.set(key, data, NAVIGATION_TIMEOUT)
+    _local = (version, data)
+    return data
@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .models import Category, Post, Tag
+from .navigation import invalidate_navigation
+
+# Sent inside the flush transaction with counts={post_id: views_added}.
+post_views_flushed = Signal()
+
+
+# Post.updated_at versions the cached post card, so it moves whenever
+# anything the card shows changes outside of Post.save().
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        if action == 'pre_clear':
+            instance.posts.touch()
+        elif action in ('post_add', 'post_remove'):
+            Post.objects.filter(pk__in=pk_set).touch()
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        Post.objects.filter(pk=instance.pk).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    Post.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    Post.objects.filter(tags=instance).touch()
+
+
+# Category.post_count and Tag.post_count count published posts.
+
+def adjust_post_counts(category_id, tag_ids, delta):
+    if category_id:
+        Category.objects.filter(pk=category_id).update(post_count=F('post_count') + delta)
+    if tag_ids:
+        Tag.objects.filter(pk__in=tag_ids).update(post_count=F('post_count') + delta)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    # A new post counts as moving from "archived, no category" to its current state.
+    was_archived = created or instance.get_loaded_value('is_archived', instance.is_archived)
+    old_category_id = None if created else instance.get_loaded_value('category_id', instance.category_id)
+    if (was_archived, old_category_id) == (instance.is_archived, instance.category_id):
+        return
+
+    tag_ids = []
+    if not created and was_archived != instance.is_archived:
+        tag_ids = list(instance.tags.values_list('pk', flat=True))
+    if not was_archived:
+        adjust_post_counts(old_category_id, tag_ids, -1)
+    if not instance.is_archived:
+        adjust_post_counts(instance.category_id, tag_ids, 1)
+    navigation_changed(sender)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # The tag rows are cascade-deleted without m2m_changed, so read them first.
+    if not instance.is_archived:
+        adjust_post_counts(instance.category_id, list(instance.tags.values_list('pk', flat=True)), -1)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def tag_counts_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_remove':
+        # remove() reports every id it was given, attached or not, so note
+        # which links exist; locking them keeps a concurrent remove from counting them too.
+        links = sender.objects.select_for_update()
+        if reverse:
+            links = links.filter(tag_id=instance.pk, post_id__in=pk_set).values_list('post_id', flat=True)
+        else:
+            links = links.filter(post_id=instance.pk, tag_id__in=pk_set).values_list('tag_id', flat=True)
+        instance._removed_tag_links = set(links)
+        return
+    if action == 'post_remove':
+        pk_set = instance.__dict__.pop('_removed_tag_links', set())
+
+    delta = {'post_add': 1, 'post_remove': -1, 'pre_clear': -1}.get(action)
+    if delta is None:
+        return
+    if reverse:
+        posts = instance.posts.all() if action == 'pre_clear' else Post.objects.filter(pk__in=pk_set)
+        published = posts.filter(is_archived=False).count()
+        Tag.objects.filter(pk=instance.pk).update(post_count=F('post_count') + delta * published)
+    elif not instance.is_archived:
+        tag_ids = instance.tags.values_list('pk', flat=True) if action == 'pre_clear' else pk_set
+        adjust_post_counts(None, list(tag_ids), delta)
+
+
+# Navigation lists categories and tags with their post counts.
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(post_delete, sender=Post)
+def navigation_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_navigation)
@@ -1,10 +1,10 @@
 from django import template
 from django.utils.safestring import mark_safe
-import markdown as md
+from blog.utils import render_markdown
 
 register = template.Library()
 
 
 @register.filter(name='markdown')
 def markdown_format(text):
-    return mark_safe(md.markdown(text, extensions=['fenced_code', 'tables', 'nl2br']))
+    return mark_safe(render_markdown(text))
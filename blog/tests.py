@@ -1,3 +1,512 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from comments.models import Comment
+from dashboard.models import DailyPostViews
+from .checks import check_counter_cache
+from .models import Category, Post, PostVisitorSketch, Tag
+from .navigation import get_navigation
+from .trending import update_trending_scores
+from .view_counts import (
+    DIRTY_GAP_GRACE, DIRTY_LAST_KEY, DIRTY_SLOT_KEY, QUEUED_KEY, VIEWED_COOKIE, counters, flush_views,
+    get_pending_views, increment, record_view, record_visitor,
+)
+
+
+class PostCardQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Django')
+        cls.tags = [Tag.objects.create(name='python'), Tag.objects.create(name='web')]
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        Profile.objects.create(user=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_posts(self, count, author=None):
+        for _ in range(count):
+            if author is None:
+                index = User.objects.count()
+                post_author = User.objects.create_user(f'user{index}', f'user{index}@example.com', 'password')
+                Profile.objects.create(user=post_author)
+            else:
+                post_author = author
+            post = Post.objects.create(
+                author=post_author,
+                title='Card post',
+                excerpt='Excerpt',
+                content='Some *markdown* content',
+                category=self.category,
+            )
+            post.tags.set(self.tags)
+            Comment.objects.create(user=post_author, post=post, content='First!')
+            Post.objects.filter(pk=post.pk).update(comment_count=1)
+
+    def count_queries(self, url):
+        # Measure the uncached render, not a page cache hit.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, url, author=None):
+        self.create_posts(2, author)
+        # The first request may build rollup rows lazily; measure from the second.
+        self.count_queries(url)
+        baseline = self.count_queries(url)
+        self.create_posts(8, author)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_blog_home(self):
+        self.assertConstantQueries(reverse('blog_home'))
+
+    def test_home_page(self):
+        self.assertConstantQueries(reverse('home'))
+
+    def test_user_profile(self):
+        self.assertConstantQueries(reverse('user_profile', args=[self.author.username]), self.author)
+
+    def test_card_shows_comment_count(self):
+        self.create_posts(1)
+        response = self.client.get(reverse('blog_home'))
+        self.assertEqual(response.context['posts'][0].comment_count, 1)
+
+
+class BlogHomePaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        Post.objects.bulk_create(
+            Post(author=author, title=f'Post {i}', slug=f'post-{i}', content='Body') for i in range(30)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_mode(self):
+        response = self.client.get(reverse('blog_home'), {'page': 3})
+        self.assertEqual(len(response.context['posts']), 6)
+        self.assertEqual(response.context['paginator'].num_pages, 3)
+
+    def test_cursor_mode_walks_every_post_once(self):
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(reverse('blog_home'), {'cursor': cursor})
+            seen.extend(post.pk for post in response.context['posts'])
+            cursor = response.context['page_obj'].next_cursor
+        self.assertEqual(sorted(seen), sorted(Post.objects.values_list('pk', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('blog_home'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.title_match = Post.objects.create(
+            author=cls.author, title='Tuning Postgres', content='Notes on R&D indexes and postgres.')
+        cls.body_match = Post.objects.create(
+            author=cls.author, title='Weekly notes', content='We briefly mention postgres here.')
+        Post.objects.create(author=cls.author, title='Unrelated', content='Nothing to see.')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query, **params):
+        return self.client.get(reverse('blog_home'), {'q': query, **params})
+
+    def test_results_are_ranked(self):
+        response = self.search('postgres')
+        self.assertEqual(list(response.context['posts']), [self.title_match, self.body_match])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        response = self.search('indexes')
+        snippet = response.context['posts'][0].search_snippet
+        self.assertIn('<mark>indexes</mark>', snippet)
+        self.assertIn('R&amp;D', snippet)
+
+    def test_vector_follows_edits(self):
+        self.body_match.content = 'Now about caching instead.'
+        self.body_match.save()
+        self.assertEqual(list(self.search('postgres').context['posts']), [self.title_match])
+        self.assertEqual(list(self.search('caching').context['posts']), [self.body_match])
+
+    def test_search_ignores_cursor(self):
+        response = self.search('postgres', cursor='')
+        self.assertEqual(response.context['paginator'].count, 2)
+
+
+class NavigationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.category = Category.objects.create(name='Django')
+        Post.objects.create(author=cls.author, title='Published', content='Body', category=cls.category)
+        Post.objects.create(
+            author=cls.author, title='Archived', content='Body', category=cls.category, is_archived=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def category_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [q['sql'] for q in queries if 'FROM "blog_category"' in q['sql']]
+
+    def test_navigation_is_cached(self):
+        self.assertEqual(len(self.category_queries(reverse('about'))), 1)
+        self.assertEqual(self.category_queries(reverse('about')), [])
+
+    def test_fragments_do_not_query_navigation(self):
+        post = Post.objects.get(title='Published')
+        comment = Comment.objects.create(user=self.author, post=post, content='Root')
+        self.assertEqual(self.category_queries(reverse('comment_replies', args=[post.slug, comment.pk])), [])
+
+    def test_counts_published_posts_and_invalidates(self):
+        self.assertEqual(get_navigation()['categories'][0].post_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.author, title='Another', content='Body', category=self.category)
+            Category.objects.create(name='Design')
+        categories = get_navigation()['categories']
+        self.assertEqual([(c.name, c.post_count) for c in categories], [('Design', 0), ('Django', 2)])
+
+
+class TaxonomyCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.django = Category.objects.create(name='Django')
+        cls.design = Category.objects.create(name='Design')
+        cls.python, cls.web, cls.css = (Tag.objects.create(name=name) for name in ('python', 'web', 'css'))
+
+    def setUp(self):
+        cache.clear()
+
+    def assertCountsInSync(self):
+        for model in (Category, Tag):
+            for obj in model.objects.all():
+                published = obj.posts.filter(is_archived=False).count()
+                self.assertEqual(obj.post_count, published, obj.name)
+
+    def test_counts_follow_post_lifecycle(self):
+        post = Post.objects.create(author=self.author, title='One', content='Body', category=self.django)
+        post.tags.set([self.python, self.web])
+        self.assertCountsInSync()
+
+        post.is_archived = True
+        post.save(update_fields=['is_archived'])
+        self.assertCountsInSync()
+
+        post = Post.objects.get(pk=post.pk)
+        post.is_archived = False
+        post.category = self.design
+        post.save()
+        post.tags.remove(self.web)
+        self.assertCountsInSync()
+
+        self.css.posts.add(post)
+        post.tags.clear()
+        self.assertCountsInSync()
+
+        post.tags.add(self.python)
+        post.delete()
+        self.assertCountsInSync()
+
+    def test_removing_unattached_tags_leaves_counts_alone(self):
+        post = Post.objects.create(author=self.author, title='One', content='Body', category=self.django)
+        post.tags.set([self.python, self.web])
+        post.tags.remove(self.web)
+
+        post.tags.remove(self.css, self.web, self.python)
+        self.assertCountsInSync()
+        self.css.posts.remove(post)
+        self.web.posts.remove(post)
+        self.assertCountsInSync()
+
+    def test_reconcile_repairs_drift(self):
+        Post.objects.create(author=self.author, title='One', content='Body', category=self.django)
+        Category.objects.update(post_count=7)
+        call_command('reconcile_post_counts', stdout=StringIO())
+        self.assertCountsInSync()
+
+    def test_tag_filter_any_and_all(self):
+        both = Post.objects.create(author=self.author, title='Both', content='Body')
+        both.tags.set([self.python, self.web])
+        only_python = Post.objects.create(author=self.author, title='Python', content='Body')
+        only_python.tags.set([self.python])
+
+        url = reverse('blog_home')
+        tags = [self.python.pk, self.web.pk]
+        response = self.client.get(url, {'tag': tags})
+        self.assertEqual(set(response.context['posts']), {both, only_python})
+        response = self.client.get(url, {'tag': tags, 'match': 'all'})
+        self.assertEqual(list(response.context['posts']), [both])
+
+
+class SlugTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+
+    def test_duplicate_titles_get_numbered_slugs(self):
+        slugs = [Post.objects.create(author=self.author, title='Hello World', content='Body').slug for _ in range(3)]
+        self.assertEqual(slugs, ['hello-world', 'hello-world-1', 'hello-world-2'])
+
+    def test_blank_title_still_gets_a_slug(self):
+        self.assertEqual(Post.objects.create(author=self.author, title='!!!', content='Body').slug, 'post')
+
+
+class ReadingStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+
+    def test_save_stores_reading_stats(self):
+        post = Post.objects.create(author=self.author, title='Stats', content='word ' * 450)
+        self.assertEqual((post.word_count, post.read_minutes), (450, 2))
+
+        post.content = 'just three words'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.word_count, post.read_time), (3, 1))
+
+    def test_backfill_command(self):
+        Post.objects.bulk_create([Post(author=self.author, title='Old', slug='old', content='word ' * 600)])
+        post = Post.objects.get(slug='old')
+        self.assertIsNone(post.read_minutes)
+        self.assertEqual(post.read_time, 3)
+
+        call_command('backfill_reading_stats', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.word_count, post.read_minutes), (600, 3))
+
+
+class RenderedContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+
+    def test_detail_uses_stored_html(self):
+        post = Post.objects.create(author=self.author, title='Rendered', content='# Title\n\n**bold**')
+        self.assertIn('<strong>bold</strong>', post.content_html)
+
+        Post.objects.filter(pk=post.pk).update(content_html='<p>cached</p>')
+        response = self.client.get(reverse('post_detail', args=[post.slug]))
+        self.assertContains(response, '<p>cached</p>')
+
+    def test_rerender_command_updates_stale_rows(self):
+        Post.objects.bulk_create([Post(author=self.author, title='Stale', slug='stale', content='*hi*')])
+        call_command('rerender_posts', stdout=StringIO())
+        post = Post.objects.get(slug='stale')
+        self.assertEqual(post.content_html, '<p><em>hi</em></p>')
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        Profile.objects.create(user=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, title, age, views=0, comments=0, **kwargs):
+        post = Post.objects.create(author=self.author, title=title, content='Body', views=views, **kwargs)
+        Post.objects.filter(pk=post.pk).update(created_at=timezone.now() - age)
+        if views:
+            DailyPostViews.objects.create(post=post, author=self.author, day=timezone.localdate(), views=views)
+        for _ in range(comments):
+            Comment.objects.create(user=self.author, post=post, content='Nice')
+        return post
+
+    def test_recent_activity_beats_lifetime_views(self):
+        classic = self.create_post('Classic', timedelta(days=400), views=5000)
+        fresh = self.create_post('Fresh', timedelta(hours=6), views=40, comments=2)
+        steady = self.create_post('Steady', timedelta(days=3), views=200)
+        self.create_post('Archived', timedelta(hours=1), views=900, is_archived=True)
+
+        update_trending_scores()
+
+        response = self.client.get(reverse('home'))
+        self.assertEqual([post.title for post in response.context['featured_posts']], ['Fresh', 'Steady', 'Classic'])
+        classic.refresh_from_db()
+        self.assertEqual(classic.trending_score, 0)
+        self.assertGreater(Post.objects.get(pk=fresh.pk).trending_score, Post.objects.get(pk=steady.pk).trending_score)
+
+    def test_archiving_clears_the_score(self):
+        post = self.create_post('Hot', timedelta(hours=3), views=300)
+        self.create_post('Quiet', timedelta(days=20), views=5)
+        update_trending_scores()
+
+        post = Post.objects.get(pk=post.pk)
+        post.is_archived = True
+        post.save(update_fields=['is_archived'])
+        self.assertEqual(Post.objects.get(pk=post.pk).trending_score, 0)
+
+        post.is_archived = False
+        post.save(update_fields=['is_archived'])
+        response = self.client.get(reverse('home'))
+        self.assertEqual([p.title for p in response.context['featured_posts']], ['Quiet', 'Hot'])
+
+    def test_scores_decay_and_reruns_only_write_changes(self):
+        post = self.create_post('Fading', timedelta(days=2), views=100)
+        now = timezone.now()
+        self.assertEqual(update_trending_scores(now), 1)
+        self.assertEqual(update_trending_scores(now), 0)
+        first = Post.objects.get(pk=post.pk).trending_score
+
+        update_trending_scores(now + timedelta(days=1))
+        self.assertLess(Post.objects.get(pk=post.pk).trending_score, first)
+
+        update_trending_scores(now + timedelta(days=40))
+        self.assertEqual(Post.objects.get(pk=post.pk).trending_score, 0)
+
+
+class BufferedViewCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.post = Post.objects.create(author=author, title='Popular', content='Body')
+
+    def setUp(self):
+        cache.clear()
+        counters.clear()
+        # Pretend a flush just happened so record_view only buffers.
+        counters.set('post_views:flushed_recently', True)
+
+    def test_views_are_buffered_then_flushed(self):
+        for _ in range(5):
+            record_view(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 0)
+
+        self.assertEqual(flush_views(), 5)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 5)
+        self.assertEqual(get_pending_views([self.post.pk]), {})
+
+    def test_flush_reads_only_queued_posts(self):
+        for i in range(3):
+            Post.objects.create(author=self.post.author, title=f'Quiet {i}', content='Body')
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_views(), 0)
+
+        record_view(self.post.pk)
+        flush_views()
+        record_view(self.post.pk)
+        self.assertEqual(flush_views(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_requeue_recovers_lost_queue_entries(self):
+        record_view(self.post.pk)
+        counters.delete_many(['post_views:dirty:1', 'post_views:queued:{}'.format(self.post.pk)])
+        self.assertEqual(flush_views(), 0)
+
+        later = time.time() + DIRTY_GAP_GRACE + 1
+        with mock.patch('blog.view_counts.time.time', return_value=later):
+            call_command('flush_post_views', requeue=True, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+
+    def test_flush_waits_for_a_slot_being_written(self):
+        # A view lands between numbering its slot and writing it.
+        counters.set(QUEUED_KEY.format(self.post.pk), True)
+        slot = increment(DIRTY_LAST_KEY)
+        counters.set('post_views:pending:{}'.format(self.post.pk), 1)
+        self.assertEqual(flush_views(), 0)
+
+        counters.set(DIRTY_SLOT_KEY.format(slot), self.post.pk)
+        self.assertEqual(flush_views(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 1)
+        self.assertIsNone(counters.get(QUEUED_KEY.format(self.post.pk)))
+
+    def test_flush_skips_an_abandoned_slot_after_the_grace_period(self):
+        increment(DIRTY_LAST_KEY)
+        record_view(self.post.pk)
+        self.assertEqual(flush_views(), 0)
+        self.assertEqual(flush_views(), 0)
+
+        later = time.time() + DIRTY_GAP_GRACE + 1
+        with mock.patch('blog.view_counts.time.time', return_value=later):
+            self.assertEqual(flush_views(), 1)
+
+    def test_failed_flush_keeps_pending_views(self):
+        record_view(self.post.pk)
+        record_view(self.post.pk)
+        with mock.patch('blog.view_counts.Post.objects.filter', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_views()
+        self.assertEqual(get_pending_views([self.post.pk]), {self.post.pk: 2})
+
+        flush_views()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_views_are_deduplicated_without_sessions(self):
+        url = reverse('post_detail', args=[self.post.slug])
+        response = self.client.get(url)
+        self.assertIn(VIEWED_COOKIE, response.cookies)
+
+        response = self.client.get(url)
+        self.assertNotIn(VIEWED_COOKIE, response.cookies)
+        self.assertEqual(get_pending_views([self.post.pk]), {self.post.pk: 1})
+        self.assertFalse(Session.objects.exists())
+
+    def test_tampered_cookie_is_ignored(self):
+        url = reverse('post_detail', args=[self.post.slug])
+        self.client.get(url)
+        self.client.cookies[VIEWED_COOKIE] = 'visitor:' + 'A' * 344
+
+        self.client.get(url)
+        self.assertEqual(get_pending_views([self.post.pk]), {self.post.pk: 2})
+
+    def test_unique_visitors_are_merged_on_flush(self):
+        for visitor in range(500):
+            record_visitor(self.post.pk, visitor)
+            record_visitor(self.post.pk, visitor)
+        flush_views()
+        self.post.refresh_from_db()
+        self.assertAlmostEqual(self.post.unique_visitors, 500, delta=50)
+
+        for visitor in range(500, 1000):
+            record_visitor(self.post.pk, visitor)
+        flush_views()
+        self.post.refresh_from_db()
+        self.assertAlmostEqual(self.post.unique_visitors, 1000, delta=100)
+        self.assertTrue(PostVisitorSketch.objects.filter(post=self.post).exists())
+
+    def test_deploy_check_rejects_process_local_counter_cache(self):
+        self.assertEqual([error.id for error in check_counter_cache(None)], ['blog.W001'])
+        redis = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}
+        with override_settings(CACHES={**settings.CACHES, 'counters': redis}):
+            self.assertEqual(check_counter_cache(None), [])
+
+    def test_unchanged_sketches_are_not_rewritten(self):
+        record_visitor(self.post.pk, 'reader')
+        flush_views()
+
+        with CaptureQueriesContext(connection) as queries:
+            flush_views()
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE'))])
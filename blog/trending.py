@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from comments.models import Comment
+from dashboard.models import DailyPostViews
+from .models import Post
+
+# Views and comments older than this no longer count towards a post's score.
+ACTIVITY_WINDOW = timedelta(days=7)
+# Posts older than this are not considered at all.
+MAX_AGE = timedelta(days=30)
+COMMENT_WEIGHT = 5
+GRAVITY = 1.5
+
+
+def trending_score(views, comments, age):
+    hours = age.total_seconds() / 3600
+    return (views + COMMENT_WEIGHT * comments) / (hours + 2) ** GRAVITY
+
+
+def trending_candidates(now):
+    # Archiving a post zeroes its score (see Post.save), so archived posts need no pass.
+    return Post.objects.filter(is_archived=False).filter(
+        Q(created_at__gte=now - MAX_AGE) | Q(trending_score__gt=0))
+
+
+def update_trending_scores(now=None):
+    """Recompute Post.trending_score for posts that can trend or still have a score.
+
+    Only recent posts and posts with a non-zero score are read, so the cost
+    follows recent activity rather than the size of the table. Returns the
+    number of posts whose score changed.
+    """
+    now = now or timezone.now()
+    since = now - ACTIVITY_WINDOW
+    candidates = {
+        pk: (created_at, score)
+        for pk, created_at, score in trending_candidates(now).values_list('pk', 'created_at', 'trending_score')
+    }
+    if not candidates:
+        return 0
+
+    views = dict(
+        DailyPostViews.objects.filter(post_id__in=candidates, day__gte=timezone.localdate(since))
+        .values('post_id').annotate(total=Sum('views')).values_list('post_id', 'total').order_by()
+    )
+    comments = dict(
+        Comment.objects.filter(post_id__in=candidates, created_at__gte=since)
+        .values('post_id').annotate(total=Count('pk')).values_list('post_id', 'total').order_by()
+    )
+
+    changed = []
+    for pk, (created_at, old_score) in candidates.items():
+        score = 0.0
+        if now - created_at < MAX_AGE:
+            score = trending_score(views.get(pk, 0), comments.get(pk, 0), now - created_at)
+        if score != old_score:
+            changed.append(Post(pk=pk, trending_score=score))
+    Post.objects.bulk_update(changed, ['trending_score'], batch_size=1000)
+    return len(changed)
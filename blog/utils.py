@@ -0,0 +1,32 @@
+import re
+
+import markdown
+
+WORDS_PER_MINUTE = 200
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'nl2br']
+# Bump after changing MARKDOWN_EXTENSIONS, then run `manage.py rerender_posts`.
+MARKDOWN_RENDER_VERSION = 1
+
+FENCED_CODE_RE = re.compile(r'```[\s\S]*?```')
+INLINE_CODE_RE = re.compile(r'`[^`]+`')
+HEADING_RE = re.compile(r'#+ ')
+LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+EMPHASIS_RE = re.compile(r'[*_~`]')
+
+
+def count_words(markdown_text):
+    text = FENCED_CODE_RE.sub('', markdown_text)
+    text = INLINE_CODE_RE.sub('', text)
+    text = HEADING_RE.sub('', text)
+    text = LINK_RE.sub(r'\1', text)
+    text = EMPHASIS_RE.sub('', text)
+    return len(text.split())
+
+
+def estimate_read_time(word_count):
+    return max(1, round(word_count / WORDS_PER_MINUTE))
+
+
+def render_markdown(text):
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
@@ -0,0 +1,249 @@
+import base64
+import binascii
+import logging
+import secrets
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils.connection import ConnectionProxy
+
+from core.sketches import BloomFilter, HyperLogLog
+from .models import Post, PostVisitorSketch
+from .signals import post_views_flushed
+
+logger = logging.getLogger(__name__)
+
+# Pending counts exist nowhere else until flushed; see the 'counters' entry in CACHES.
+counters = ConnectionProxy(caches, 'counters')
+
+PENDING_KEY = 'post_views:pending:{}'
+FLUSHED_RECENTLY_KEY = 'post_views:flushed_recently'
+FLUSH_LOCK_KEY = 'post_views:flush_lock'
+FLUSH_LOCK_TIMEOUT = 300
+VISITORS_KEY = 'post_visitors:pending:{}'
+VISITORS_TIMEOUT = 60 * 60 * 24
+
+# Posts with pending views or visitors are appended to a log of numbered
+# slots, so a flush reads only those instead of every post.
+DIRTY_LAST_KEY = 'post_views:dirty:last'
+DIRTY_FLUSHED_KEY = 'post_views:dirty:flushed'
+DIRTY_SLOT_KEY = 'post_views:dirty:{}'
+DIRTY_SLOT_TIMEOUT = 60 * 60 * 24
+DIRTY_GAP_KEY = 'post_views:dirty:gap'
+# A slot is numbered before it is written, so a flush waits this many seconds
+# for a missing slot before giving up on it as lost.
+DIRTY_GAP_GRACE = 10
+QUEUED_KEY = 'post_views:queued:{}'
+# A slot lost to a crashed worker delays that post's counts until its next
+# view after this many seconds.
+QUEUED_TIMEOUT = 60 * 60
+
+VIEWED_COOKIE = 'viewed_posts'
+VIEWED_COOKIE_SALT = 'blog.viewed_posts'
+# Start a fresh filter before false positives (uncounted first views) become common.
+VIEWED_MAX_FILL = 0.35
+
+
+class ViewedPosts:
+    """Posts this browser was already counted for, kept in a signed cookie.
+
+    The cookie holds a random visitor id and a fixed-size Bloom filter, so it
+    stays small however many posts are read and needs no session row.
+    """
+
+    def __init__(self, request):
+        value = request.get_signed_cookie(
+            VIEWED_COOKIE, default='', salt=VIEWED_COOKIE_SALT, max_age=settings.SESSION_COOKIE_AGE)
+        visitor, _, encoded = value.partition(':')
+        try:
+            data = base64.urlsafe_b64decode(encoded)
+        except (binascii.Error, ValueError):
+            data = b''
+        self.filter = BloomFilter(data if len(data) == BloomFilter().size // 8 else None)
+        self.visitor = visitor or secrets.token_hex(8)
+        self.changed = False
+
+    def add(self, post_id):
+        """Remember ``post_id``; return False if it was (probably) seen before."""
+        if post_id in self.filter:
+            return False
+        if self.filter.fill_ratio() > VIEWED_MAX_FILL:
+            self.filter = BloomFilter()
+        self.filter.add(post_id)
+        self.changed = True
+        return True
+
+    def set_cookie(self, response):
+        encoded = base64.urlsafe_b64encode(self.filter.to_bytes()).decode()
+        response.set_signed_cookie(
+            VIEWED_COOKIE, f'{self.visitor}:{encoded}', salt=VIEWED_COOKIE_SALT,
+            max_age=settings.SESSION_COOKIE_AGE, path=reverse('blog_home'),
+            secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+        )
+
+
+def increment(key):
+    try:
+        return counters.incr(key)
+    except ValueError:
+        counters.add(key, 0, timeout=None)
+        return counters.incr(key)
+
+
+def mark_dirty(post_id):
+    """Queue ``post_id`` for the next flush unless it is already queued."""
+    if counters.add(QUEUED_KEY.format(post_id), True, timeout=QUEUED_TIMEOUT):
+        counters.set(DIRTY_SLOT_KEY.format(increment(DIRTY_LAST_KEY)), post_id, timeout=DIRTY_SLOT_TIMEOUT)
+
+
+def record_view(post_id):
+    increment(PENDING_KEY.format(post_id))
+    mark_dirty(post_id)
+
+    if counters.add(FLUSHED_RECENTLY_KEY, True, timeout=settings.POST_VIEW_FLUSH_INTERVAL):
+        try:
+            flush_views()
+        except DatabaseError:
+            # Pending counts stay in the cache and are retried on the next flush.
+            logger.exception('Flushing buffered post views failed')
+
+
+def record_visitor(post_id, visitor):
+    key = VISITORS_KEY.format(post_id)
+    sketch = HyperLogLog(counters.get(key))
+    # Most visitors leave the sketch unchanged once it fills up; those cost no write.
+    # Concurrent writers can drop each other's update, which only loosens the estimate.
+    if sketch.add(visitor):
+        counters.set(key, sketch.to_bytes(), VISITORS_TIMEOUT)
+        mark_dirty(post_id)
+
+
+def get_pending_views(post_ids):
+    keys = {PENDING_KEY.format(pk): pk for pk in post_ids}
+    return {keys[key]: count for key, count in counters.get_many(keys).items() if count > 0}
+
+
+def apply_views(counts):
+    posts_by_count = defaultdict(list)
+    for pk, count in counts.items():
+        posts_by_count[count].append(pk)
+
+    with transaction.atomic():
+        for count, pks in posts_by_count.items():
+            Post.objects.filter(pk__in=pks).update(views=F('views') + count)
+        post_views_flushed.send(sender=Post, counts=counts)
+
+    # Only drain the buffer once the database has the counts. Views recorded
+    # while the update ran stay pending for the next flush.
+    for pk, count in counts.items():
+        try:
+            counters.decr(PENDING_KEY.format(pk), count)
+        except ValueError:
+            pass
+
+
+def flush_views(batch_size=1000):
+    """Write buffered view counts to the database.
+
+    Returns the number of views flushed, or None if another flush holds the lock.
+    """
+    if not counters.add(FLUSH_LOCK_KEY, True, timeout=FLUSH_LOCK_TIMEOUT):
+        return None
+
+    try:
+        flushed = 0
+        last = counters.get(DIRTY_LAST_KEY, 0)
+        first = counters.get(DIRTY_FLUSHED_KEY, 0) + 1
+        while first <= last:
+            end = min(first + batch_size - 1, last)
+            slots = [DIRTY_SLOT_KEY.format(slot) for slot in range(first, end + 1)]
+            found = counters.get_many(slots)
+            for slot, key in enumerate(slots, first):
+                if key not in found and not slot_abandoned(slot):
+                    # Stop short of a slot still being written; the next flush resumes here.
+                    last = end = slot - 1
+                    slots = slots[:slot - first]
+                    break
+            post_ids = {found[key] for key in slots if key in found}
+            # Unqueue before the counts are read, so a view recorded after the
+            # read queues its post again.
+            if post_ids:
+                counters.delete_many([QUEUED_KEY.format(pk) for pk in post_ids])
+                flushed += flush_batch(sorted(post_ids))
+            # Only move past these slots once their counts are in the database.
+            counters.set(DIRTY_FLUSHED_KEY, end, timeout=None)
+            counters.delete_many(slots)
+            first = end + 1
+        return flushed
+    finally:
+        counters.delete(FLUSH_LOCK_KEY)
+
+
+def slot_abandoned(slot):
+    """Whether a missing slot has stayed missing past the grace period."""
+    gap = counters.get(DIRTY_GAP_KEY)
+    now = time.time()
+    if gap is None or gap[0] != slot:
+        counters.set(DIRTY_GAP_KEY, (slot, now), timeout=None)
+        return False
+    return now - gap[1] > DIRTY_GAP_GRACE
+
+
+def requeue_pending(batch_size=1000):
+    """Queue every post with buffered views or visitors; returns how many.
+
+    Recovers counts whose queue entry was lost, at the cost of reading every post id.
+    """
+    queued = 0
+    post_ids = Post.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size)
+    while batch := list(islice(post_ids, batch_size)):
+        pending = set(get_pending_views(batch))
+        visitors = {VISITORS_KEY.format(pk): pk for pk in batch}
+        pending.update(visitors[key] for key in counters.get_many(visitors))
+        for pk in pending:
+            counters.delete(QUEUED_KEY.format(pk))
+            mark_dirty(pk)
+        queued += len(pending)
+    return queued
+
+
+def flush_batch(post_ids):
+    counts = get_pending_views(post_ids)
+    if counts:
+        apply_views(counts)
+    merge_visitors(post_ids)
+    return sum(counts.values())
+
+
+def merge_visitors(post_ids):
+    # Merging is idempotent, so cached sketches are left to expire rather than
+    # drained; only sketches that add registers are written back.
+    keys = {VISITORS_KEY.format(pk): pk for pk in post_ids}
+    pending = {keys[key]: registers for key, registers in counters.get_many(keys).items()}
+    if not pending:
+        return
+
+    stored = dict(PostVisitorSketch.objects.filter(post_id__in=pending).values_list('post_id', 'registers'))
+    merged = {}
+    for pk, registers in pending.items():
+        sketch = HyperLogLog(stored.get(pk))
+        before = sketch.to_bytes()
+        sketch.merge(HyperLogLog(registers))
+        if sketch.to_bytes() != before:
+            merged[pk] = sketch
+    if not merged:
+        return
+
+    with transaction.atomic():
+        PostVisitorSketch.objects.bulk_create(
+            [PostVisitorSketch(post_id=pk, registers=sketch.to_bytes()) for pk, sketch in merged.items()],
+            update_conflicts=True, unique_fields=['post'], update_fields=['registers'],
+        )
+        Post.objects.bulk_update(
+            [Post(pk=pk, unique_visitors=sketch.count()) for pk, sketch in merged.items()], ['unique_visitors'])
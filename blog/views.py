@@ -1,48 +1,85 @@
 from django.shortcuts import redirect, get_object_or_404
+from django.core.paginator import InvalidPage
+from django.http import Http404
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, FormView
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from core.page_cache import AnonymousPageCacheMixin
+from core.pagination import CursorPaginator
 from .forms import BlogPostForm
-from .models import Post, Category, Tag
+from .models import Post
+from .navigation import get_navigation
+from .search import highlight, search_posts
+from .view_counts import ViewedPosts, record_view, record_visitor
 
 
-class BlogHomeView(ListView):
+class BlogHomeView(AnonymousPageCacheMixin, ListView):
     model = Post
     template_name = 'blog/blog_home.html'
     context_object_name = 'posts'
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    paginate_by = 12
+    page_cache_params = ('category', 'cursor', 'match', 'page', 'q', 'tag')
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.search_query = request.GET.get('q', '').strip()
+
+    def selected_tags(self):
+        return [int(tag) for tag in self.request.GET.getlist('tag') if tag.isdigit()]
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get('cursor')
+        # Ranked search results have no stable keyset, so they always use page numbers.
+        if cursor is None or self.search_query:
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            page = CursorPaginator(queryset, page_size).page(cursor)
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return (None, page, page.object_list, bool(cursor) or page.has_next())
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(is_archived=False)
+        queryset = super().get_queryset().for_cards().filter(is_archived=False)
 
-        selected_category = self.request.GET.get('category')
-        if selected_category:
+        selected_category = self.request.GET.get('category', '')
+        if selected_category.isdigit():
             queryset = queryset.filter(category_id=selected_category)
 
-        selected_tag = self.request.GET.get('tag')
-        if selected_tag:
-            queryset = queryset.filter(tags__id=selected_tag)
+        selected_tags = self.selected_tags()
+        if selected_tags:
+            queryset = queryset.with_tags(selected_tags, match_all=self.request.GET.get('match') == 'all')
+
+        if self.search_query:
+            queryset = search_posts(queryset, self.search_query)
 
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        navigation = get_navigation()
+        if self.search_query:
+            for post in context['posts']:
+                post.search_snippet = highlight(post.headline)
         context.update({
+            'search_query': self.search_query,
             'total_posts': Post.objects.filter(is_archived=False).count(),
-            'categories': Category.objects.all(),
-            'tags': Tag.objects.all(),
+            'categories': navigation['categories'],
+            'tags': navigation['tags'],
             'selected_category': self.request.GET.get('category'),
-            'selected_tag': self.request.GET.get('tag'),
-            'all_categories': Category.objects.all()
+            'selected_tags': [str(tag) for tag in self.selected_tags()],
+            'tag_match': self.request.GET.get('match', 'any'),
         })
         return context
 
 
 def get_base_context(request):
     return {
-        'all_categories': Category.objects.all()
+        'all_categories': SimpleLazyObject(lambda: get_navigation()['categories']),
+        'all_tags': SimpleLazyObject(lambda: get_navigation()['tags']),
     }
 
 
@@ -92,8 +129,7 @@ class WriteBlogView(LoginRequiredMixin, FormView):
 
         cover_image_file = form.cleaned_data.get('cover_image')
         if cover_image_file:
-            post.cover_image = cover_image_file.read()
-            post.cover_image_type = cover_image_file.content_type
+            post.set_cover_image(cover_image_file)
 
         post.save()
 
@@ -120,21 +156,29 @@ class PostDetailView(DetailView):
     slug_field = 'slug'
     slug_url_kwarg = 'slug'
 
+    def get_queryset(self):
+        return super().get_queryset().for_detail()
+
+    def get(self, request, *args, **kwargs):
+        self.viewed_posts = ViewedPosts(request)
+        response = super().get(request, *args, **kwargs)
+        if self.viewed_posts.changed:
+            self.viewed_posts.set_cookie(response)
+        return response
+
     def get_object(self, queryset=None):
         post = super().get_object(queryset)
         self._increment_view_count(post)
         return post
 
     def _increment_view_count(self, post):
-        if self.request.user.is_authenticated and self.request.user == post.author:
+        user = self.request.user
+        if user.is_authenticated and user == post.author:
             return
-        
-        session_key = f'post_viewed_{post.id}'
-        
-        if not self.request.session.get(session_key, False):
-            post.views += 1
-            post.save(update_fields=['views'])
-            self.request.session[session_key] = True
+
+        if self.viewed_posts.add(post.id):
+            record_view(post.id)
+            record_visitor(post.id, f'user:{user.pk}' if user.is_authenticated else self.viewed_posts.visitor)
 
 class DeletePostView(LoginRequiredMixin, DetailView):
     model = Post
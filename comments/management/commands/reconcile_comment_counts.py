@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Post
+from comments.models import Comment
+
+
+def count_comments(field):
+    return Coalesce(Subquery(
+        Comment.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in the denormalized Post.comment_count and Comment.reply_count columns.'
+
+    def handle(self, *args, **options):
+        comment_count = count_comments('post')
+        posts = (
+            Post.objects.annotate(actual=comment_count)
+            .exclude(comment_count=F('actual'))
+            .update(comment_count=comment_count)
+        )
+
+        reply_count = count_comments('parent')
+        comments = (
+            Comment.objects.annotate(actual=reply_count)
+            .exclude(reply_count=F('actual'))
+            .update(reply_count=reply_count)
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fixed comment counts on {posts} posts and reply counts on {comments} comments.'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_count(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    replies = (
+        Comment.objects.filter(parent=OuterRef('pk'))
+        .order_by()
+        .values('parent')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    Comment.objects.update(reply_count=Coalesce(Subquery(replies), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reply_count, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from blog.models import Post
 from django.conf import settings
+from core.pagination import encode_cursor
 
 class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -10,13 +11,30 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         null=True,
         blank=True,
-        related_name='replies'
+        related_name='replies',
+        db_index=False,  # covered by the comments_replies index
     )
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    reply_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['post', '-created_at', '-id'], name='comments_top_level',
+                condition=models.Q(parent=None)),
+            models.Index(fields=['parent', 'created_at', 'id'], name='comments_replies'),
+        ]
 
     def __str__(self):
-        return f'Comment by {self.user.username} on {self.post.title}'
\ No newline at end of file
+        return f'Comment by {self.user.username} on {self.post.title}'
+
+    @property
+    def more_replies(self):
+        return self.reply_count - len(getattr(self, 'children', []))
+
+    @property
+    def replies_cursor(self):
+        children = getattr(self, 'children', [])
+        return encode_cursor(children[-1]) if children else ''
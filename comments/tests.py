@@ -1,3 +1,128 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Profile
+from blog.models import Post
+from .models import Comment
+from .threads import INLINE_REPLIES, REPLIES_PAGE_SIZE
+
+
+def create_thread(post, users, size):
+    """Create `size` comments: a quarter top-level, the rest nested replies.
+
+    Replies go to the newest threads first, so the first page is as deep as possible.
+    """
+    roots = Comment.objects.bulk_create(
+        Comment(user=users[i % len(users)], post=post, content=f'Comment {i}') for i in range(size // 4))
+    comments = list(roots)
+    parents = roots[::-1]
+    while len(comments) < size:
+        count = min(len(parents) * 2, size - len(comments))
+        replies = Comment.objects.bulk_create(
+            Comment(user=users[i % len(users)], post=post, parent=parents[i // 2], content=f'Reply {i}')
+            for i in range(count)
+        )
+        comments.extend(replies)
+        parents = replies
+    reconcile_counts()
+    return comments
+
+
+def reconcile_counts():
+    call_command('reconcile_comment_counts', stdout=StringIO())
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = []
+        for i in range(5):
+            user = User.objects.create_user(f'user{i}', f'user{i}@example.com', 'password')
+            Profile.objects.create(user=user)
+            cls.users.append(user)
+        cls.small_post = Post.objects.create(author=cls.users[0], title='Small', content='Body')
+        cls.large_post = Post.objects.create(author=cls.users[0], title='Large', content='Body')
+        create_thread(cls.small_post, cls.users, 8)
+        create_thread(cls.large_post, cls.users, 1000)
+
+    def count_queries(self, post):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('post_comments', args=[post.slug]))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self.assertEqual(self.count_queries(self.large_post), self.count_queries(self.small_post))
+
+    def test_top_level_comments_are_paginated(self):
+        response = self.client.get(reverse('post_comments', args=[self.large_post.slug]))
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertEqual(response.context['paginator'].num_pages, 13)
+
+
+class CommentRepliesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.post = Post.objects.create(author=cls.user, title='Viral', content='Body')
+        cls.root = Comment.objects.create(user=cls.user, post=cls.post, content='Root')
+        Comment.objects.bulk_create(
+            Comment(user=cls.user, post=cls.post, parent=cls.root, content=f'Reply {i}') for i in range(15))
+        reconcile_counts()
+
+    def test_inline_replies_are_capped(self):
+        response = self.client.get(reverse('post_comments', args=[self.post.slug]))
+        root = response.context['comments'][0]
+        self.assertEqual(len(root.children), INLINE_REPLIES)
+        self.assertEqual(root.more_replies, 15 - INLINE_REPLIES)
+        self.assertContains(response, 'Show 12 more replies')
+
+    def test_replies_fragment_pages_through_remaining_replies(self):
+        response = self.client.get(reverse('post_comments', args=[self.post.slug]))
+        cursor = response.context['comments'][0].replies_cursor
+
+        url = reverse('comment_replies', args=[self.post.slug, self.root.pk])
+        response = self.client.get(url, {'after': cursor})
+        self.assertEqual(len(response.context['replies']), REPLIES_PAGE_SIZE)
+        response = self.client.get(url, {'after': response.context['next_cursor']})
+        self.assertEqual(len(response.context['replies']), 15 - INLINE_REPLIES - REPLIES_PAGE_SIZE)
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_reply_count_follows_add_and_delete(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('add_reply', args=[self.post.slug, self.root.pk]), {'content': 'One more'})
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 16)
+
+        reply = Comment.objects.filter(parent=self.root).last()
+        self.client.post(reverse('delete_comment', args=[self.post.slug, reply.pk]))
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 15)
+
+    def test_comment_count_follows_add_and_delete(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 16)
+
+        self.client.force_login(self.user)
+        self.client.post(reverse('add_comment', args=[self.post.slug]), {'content': 'Another root'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 17)
+
+        self.client.post(reverse('delete_comment', args=[self.post.slug, self.root.pk]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
 
-# Create your tests here.
+    def test_reconcile_repairs_drift(self):
+        Post.objects.filter(pk=self.post.pk).update(comment_count=3)
+        Comment.objects.filter(pk=self.root.pk).update(reply_count=0)
+        reconcile_counts()
+        self.post.refresh_from_db()
+        self.root.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 16)
+        self.assertEqual(self.root.reply_count, 15)
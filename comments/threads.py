@@ -0,0 +1,49 @@
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+# Replies shown inline under each comment, and how many levels deep.
+INLINE_REPLIES = 3
+INLINE_DEPTH = 3
+# Replies returned per "show more replies" request.
+REPLIES_PAGE_SIZE = 10
+
+
+def thread_queryset():
+    return Comment.objects.select_related('user__profile')
+
+
+def attach_replies(comments, limit=INLINE_REPLIES, depth=INLINE_DEPTH):
+    """Attach the earliest ``limit`` replies of each comment as ``children``.
+
+    Runs one query per level, up to ``depth`` levels, however large the
+    thread is. The rest are fetched on demand; ``Comment.more_replies`` and
+    ``Comment.replies_cursor`` say how many and where to resume.
+    """
+    comments = list(comments)
+    level = comments
+    for comment in level:
+        comment.children = []
+
+    for _ in range(depth):
+        parents = {comment.pk: comment for comment in level if comment.reply_count}
+        if not parents:
+            break
+        level = list(
+            thread_queryset()
+            .filter(parent_id__in=parents)
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=F('parent_id'),
+                order_by=[F('created_at').asc(), F('pk').asc()],
+            ))
+            .filter(position__lte=limit)
+            .order_by('created_at', 'pk')
+        )
+        for reply in level:
+            reply.children = []
+            parents[reply.parent_id].children.append(reply)
+
+    return comments
+
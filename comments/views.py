@@ -2,28 +2,39 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.core.paginator import InvalidPage
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
 from django.views import View
 from django.views.generic import ListView
 from blog.models import Post
+from core.pagination import CursorPaginator
 from .models import Comment
 from .forms import CommentForm
+from .threads import REPLIES_PAGE_SIZE, attach_replies, thread_queryset
 
 
 class PostCommentsView(ListView):
     model = Comment
     template_name = 'comments/comment_thread.html'
     context_object_name = 'comments'
+    paginate_by = 20
     
     def get_queryset(self):
-        self.post = get_object_or_404(Post, slug=self.kwargs['slug'])
-        return self.post.comments.filter(parent=None).order_by('-created_at')
+        self.post = get_object_or_404(
+            Post.objects.select_related('author').defer('content', 'content_html'),
+            slug=self.kwargs['slug'],
+        )
+        return thread_queryset().filter(post=self.post, parent=None).order_by('-created_at', '-id')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
+            'comments': attach_replies(context['comments']),
             'post': self.post,
             'form': CommentForm(),
-            'comment_count': self.post.comments.count()
+            'comment_count': self.post.comment_count
         })
         return context
 
@@ -34,7 +45,7 @@ class AddCommentView(LoginRequiredMixin, View):
         parent_comment = None
         
         if comment_id:
-            parent_comment = get_object_or_404(Comment, id=comment_id)
+            parent_comment = get_object_or_404(Comment, id=comment_id, post=post)
         
         form = CommentForm(request.POST)
         if form.is_valid():
@@ -42,7 +53,11 @@ class AddCommentView(LoginRequiredMixin, View):
             comment.user = request.user
             comment.post = post
             comment.parent = parent_comment
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                Post.objects.filter(pk=post.pk).update(comment_count=F('comment_count') + 1)
+                if parent_comment:
+                    Comment.objects.filter(pk=parent_comment.pk).update(reply_count=F('reply_count') + 1)
             
             message = 'Reply posted successfully!' if parent_comment else 'Comment posted successfully!'
             messages.success(request, message)
@@ -59,9 +74,32 @@ class DeleteCommentView(LoginRequiredMixin, View):
         post = get_object_or_404(Post, slug=slug)
         
         if request.user == comment.user or request.user == post.author:
-            comment.delete()
+            with transaction.atomic():
+                _, deleted = comment.delete()
+                # Replies are cascade-deleted along with the comment.
+                Post.objects.filter(pk=comment.post_id).update(
+                    comment_count=F('comment_count') - deleted.get(Comment._meta.label, 0))
+                if comment.parent_id:
+                    Comment.objects.filter(pk=comment.parent_id).update(reply_count=F('reply_count') - 1)
             messages.success(request, 'Comment deleted successfully!')
         else:
             messages.error(request, 'You do not have permission to delete this comment.')
         
         return redirect('post_comments', slug=slug)
+
+
+class CommentRepliesView(View):
+    def get(self, request, slug, comment_id):
+        post = get_object_or_404(Post.objects.select_related('author').only('slug', 'author'), slug=slug)
+        replies = thread_queryset().filter(post=post, parent_id=comment_id)
+        try:
+            page = CursorPaginator(replies, REPLIES_PAGE_SIZE, ascending=True).page(request.GET.get('after'))
+        except InvalidPage as e:
+            raise Http404(str(e))
+
+        return render(request, 'comments/reply_page.html', {
+            'post': post,
+            'parent_id': comment_id,
+            'replies': attach_replies(page.object_list),
+            'next_cursor': page.next_cursor,
+        })
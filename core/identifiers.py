@@ -0,0 +1,51 @@
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, Count, Max, Q, When
+from django.db.models.functions import Cast, Substr
+
+
+def next_available(queryset, field, base, separator='-', max_length=None):
+    """Return ``base``, or ``base`` plus the next unused numeric suffix.
+
+    Looks at every taken ``base<separator><n>`` in a single aggregate query
+    and continues after the highest ``n``.
+    """
+    if max_length:
+        base = base[:max_length]
+    prefix = base + separator
+    suffixed = Q(**{f'{field}__regex': f'^{re.escape(prefix)}[0-9]{{1,18}}$'})
+    taken = queryset.filter(Q(**{field: base}) | suffixed).aggregate(
+        base_taken=Count('pk', filter=Q(**{field: base})),
+        highest=Max(Case(When(suffixed, then=Cast(Substr(field, len(prefix) + 1), BigIntegerField())))),
+    )
+    if not taken['base_taken']:
+        return base
+
+    suffix = f'{separator}{(taken["highest"] or 0) + 1}'
+    if max_length and len(base) + len(suffix) > max_length:
+        return next_available(queryset, field, base[:max_length - len(suffix)], separator, max_length)
+    return base + suffix
+
+
+def save_unique(instance, field, base, save, separator='-', attempts=5):
+    """Call ``save()`` with a free value for ``field``, retrying when a concurrent write takes it.
+
+    The unique constraint on ``field`` is what guarantees uniqueness; a value
+    already set on ``instance`` is tried first.
+    """
+    model = type(instance)
+    max_length = model._meta.get_field(field).max_length
+    value = getattr(instance, field)
+    for attempt in range(attempts):
+        if not value:
+            value = next_available(model._default_manager.all(), field, base, separator, max_length)
+        setattr(instance, field, value)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            clashed = model._default_manager.filter(**{field: value}).exists()
+            if not clashed or attempt == attempts - 1:
+                raise
+            value = None
@@ -0,0 +1,117 @@
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from PIL import Image, ImageOps, features
+
+from .models import ImageRendition
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Widths rendered for each kind of image; avatars are cropped square.
+RENDITIONS = {
+    'cover': (480, 960, 1600),
+    'avatar': (64, 128, 256),
+}
+DEFAULT_WIDTHS = {'cover': 960, 'avatar': 128}
+
+if features.check('webp'):
+    RENDITION_FORMAT, RENDITION_TYPE = 'WEBP', 'image/webp'
+else:
+    RENDITION_FORMAT, RENDITION_TYPE = 'JPEG', 'image/jpeg'
+
+EXTENSIONS = {'image/webp': 'webp', 'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif'}
+
+
+def validate_image_upload(upload):
+    if upload.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            f'Images must be {filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)} or smaller.',
+            code='file_too_large',
+        )
+
+
+def upload_digest(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode(image, kind, width):
+    if kind == 'avatar':
+        image = ImageOps.fit(image, (width, width), Image.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail((width, width * 2), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, RENDITION_FORMAT, quality=80)
+    return buffer.getvalue()
+
+
+def render_renditions(file, kind):
+    """Yield ``(width, data)`` for every rendition of the image in ``file``."""
+    widths = RENDITIONS[kind]
+    with Image.open(file) as image:
+        # Let JPEG decode at a reduced scale instead of inflating the full original.
+        image.draft('RGB', (widths[-1], widths[-1]))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha and RENDITION_FORMAT == 'WEBP' else 'RGB')
+        for width in widths:
+            yield width, encode(image, kind, width)
+
+
+def rendition_name(source, kind, width, content_type=RENDITION_TYPE):
+    # Named after the original's hash, so the same upload always maps to the same files.
+    return f'renditions/{kind}/{width}/{source[:2]}/{source}.{EXTENSIONS.get(content_type, "bin")}'
+
+
+def save_rendition_file(name, data):
+    """Write ``data`` under ``name`` unless it is already stored; return the stored name."""
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(data))
+
+
+def store_renditions(upload, kind):
+    """Render ``upload`` into ``RENDITIONS[kind]`` and return its content digest."""
+    source = upload_digest(upload)
+    if ImageRendition.objects.filter(source=source, kind=kind).count() < len(RENDITIONS[kind]):
+        upload.seek(0)
+        ImageRendition.objects.bulk_create(
+            [
+                ImageRendition(
+                    source=source, kind=kind, width=width, content_type=RENDITION_TYPE,
+                    file=save_rendition_file(rendition_name(source, kind, width), data),
+                )
+                for width, data in render_renditions(upload, kind)
+            ],
+            ignore_conflicts=True,
+        )
+    return source
+
+
+def rendition_url(source, kind, width=None):
+    return reverse('image_rendition', args=[kind, width or DEFAULT_WIDTHS[kind], source])
+
+
+def rendition_srcset(source, kind):
+    return ', '.join(f'{rendition_url(source, kind, width)} {width}w' for width in RENDITIONS[kind])
+
+
+def rendition_response(rendition):
+    if rendition.file:
+        response = FileResponse(rendition.file.open('rb'), content_type=rendition.content_type)
+    else:
+        response = HttpResponse(bytes(rendition.data), content_type=rendition.content_type)
+    # The URL embeds the content hash, so it can never point at other bytes.
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
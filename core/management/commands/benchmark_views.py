@@ -0,0 +1,153 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from dashboard.models import AuthorStats
+
+
+def percentile(timings, fraction):
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[round(fraction * 100) - 1]
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure latency, query count and peak Python memory of the main views against the current '
+        'database (see seed_data) and write the results as JSON for comparison between commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--output', help='Write results to this JSON file.')
+        parser.add_argument('--compare', help='Print the change against results from an earlier run.')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Clear the cache before every request instead of measuring warm caches.')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1.')
+        scenarios = self.scenarios()
+        results = {name: self.measure(client, url, options) for name, (client, url) in scenarios.items()}
+
+        report = {
+            'commit': current_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'runs': options['runs'],
+            'cold': options['cold'],
+            'posts': Post.objects.count(),
+            'results': results,
+        }
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+        self.print_report(results, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}.'))
+
+    def client(self, user=None):
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+        if user:
+            client.force_login(user)
+        return client
+
+    def scenarios(self):
+        posts = Post.objects.filter(is_archived=False)
+        popular = posts.order_by('-views').first()
+        discussed = posts.order_by('-comment_count').first()
+        stats = AuthorStats.objects.select_related('user').order_by('-post_count').first()
+        author = stats.user if stats else User.objects.filter(post__isnull=False).first()
+        if popular is None or author is None:
+            raise CommandError('No published posts to benchmark; run seed_data first.')
+
+        anonymous = self.client()
+        return {
+            'blog_home': (anonymous, reverse('blog_home')),
+            'post_detail': (anonymous, reverse('post_detail', args=[popular.slug])),
+            'post_comments': (anonymous, reverse('post_comments', args=[discussed.slug])),
+            'user_profile': (anonymous, reverse('user_profile', args=[author.username])),
+            'dashboard': (self.client(author), reverse('dashboard_home')),
+        }
+
+    def request(self, client, url, options):
+        if options['cold']:
+            cache.clear()
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}.')
+        return response
+
+    def measure(self, client, url, options):
+        if not options['cold']:
+            self.request(client, url, options)
+
+        timings, queries = [], []
+        for _ in range(options['runs']):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.request(client, url, options)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+
+        # Tracing slows everything down, so memory gets a request of its own.
+        tracemalloc.start()
+        try:
+            self.request(client, url, options)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'url': url,
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def print_report(self, results, baseline=None):
+        for name, result in results.items():
+            line = (
+                f'{name:14} median {result["median_ms"]:8.2f} ms  p95 {result["p95_ms"]:8.2f} ms  '
+                f'{result["queries"]:3} queries  peak {result["peak_kib"]:8.1f} KiB'
+            )
+            previous = (baseline or {}).get(name)
+            if previous:
+                line += (
+                    f'  | median {result["median_ms"] - previous["median_ms"]:+.2f} ms'
+                    f'  queries {result["queries"] - previous["queries"]:+d}'
+                    f'  peak {result["peak_kib"] - previous["peak_kib"]:+.1f} KiB'
+                )
+            self.stdout.write(line)
@@ -0,0 +1,363 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Post
+from .benchmark_views import current_commit, percentile
+from .seed_data import WORDS, sentence, zipf_weights
+
+DEFAULT_MIX = 'browse=60,hot_read=15,comment_burst=15,write=10'
+LOGGED_IN_SCENARIOS = {'comment_burst', 'write'}
+
+LOCK_WAITS_SQL = '''
+    SELECT a.query, l.locktype, l.relation::regclass::text
+    FROM pg_stat_activity a
+    LEFT JOIN pg_locks l ON l.pid = a.pid AND NOT l.granted
+    WHERE a.datname = current_database() AND a.wait_event_type = 'Lock'
+'''
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise CommandError(f'Unknown scenario "{name}"; choose from {", ".join(SCENARIOS)}.')
+        if not weight.strip().isdigit():
+            raise CommandError(f'Scenario "{name}" needs a whole-number weight, e.g. {name}=10.')
+        mix[name] = int(weight)
+    mix = {name: weight for name, weight in mix.items() if weight}
+    if not mix:
+        raise CommandError('--mix must give at least one scenario a positive weight.')
+    return mix
+
+
+def normalize_statement(query):
+    query = re.sub(r"'(?:[^']|'')*'|\b\d+\b", '?', query)
+    query = re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', query)
+    return ' '.join(query.split())[:200]
+
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Session:
+    """One simulated browser with its own cookies. Redirects are not followed,
+    so every sample times exactly one view."""
+
+    def __init__(self, base_url, samples, timeout):
+        self.base_url = base_url
+        self.samples = samples
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def request(self, name, path, data=None, expect=None):
+        headers = {}
+        if data is not None:
+            headers['X-CSRFToken'] = self.csrf_token()
+            data = urlencode(data, doseq=True).encode()
+        request = Request(self.base_url + path, data=data, headers=headers)
+
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            with error:
+                error.read()
+            status = error.code
+        except OSError:
+            status = 0
+        elapsed = (time.perf_counter() - started) * 1000
+
+        ok = status == expect if expect else 200 <= status < 400
+        self.samples.append((name if data is None else f'{name} POST', ok, elapsed))
+        return ok
+
+
+def browse(worker):
+    rng = worker.rng
+    query = ''
+    if rng.random() < 0.2:
+        query = '?' + urlencode({'q': rng.choice(WORDS[40:])})
+    elif rng.random() < 0.2 and worker.targets['categories']:
+        query = '?' + urlencode({'category': rng.choice(worker.targets['categories'])})
+    worker.anonymous.request('blog_home', reverse('blog_home') + query)
+
+    slug = rng.choices(worker.targets['slugs'], cum_weights=worker.targets['weights'])[0]
+    worker.anonymous.request('post_detail', reverse('post_detail', args=[slug]))
+    if rng.random() < 0.5:
+        worker.anonymous.request('post_comments', reverse('post_comments', args=[slug]))
+    if rng.random() < 0.2:
+        worker.anonymous.request('home', reverse('home'))
+
+
+def hot_read(worker):
+    # A fresh browser every time, so each request counts as a new view of the hot post.
+    reader = Session(worker.base_url, worker.samples, worker.timeout)
+    reader.request('post_detail', reverse('post_detail', args=[worker.targets['hot']]))
+
+
+def comment_burst(worker):
+    hot = worker.targets['hot']
+    for _ in range(worker.burst):
+        worker.member.request(
+            'add_comment', reverse('add_comment', args=[hot]),
+            {'content': sentence(worker.rng)}, expect=302)
+    worker.member.request('post_comments', reverse('post_comments', args=[hot]))
+
+
+def write(worker):
+    rng = worker.rng
+    worker.member.request('write_blog', reverse('write_blog'))
+    worker.member.request('write_blog', reverse('write_blog'), {
+        'title': f'Load test {sentence(rng, 3, 6)[:-1]}',
+        'excerpt': sentence(rng, 12, 30),
+        'content': '\n\n'.join(sentence(rng, 20, 40) for _ in range(rng.randint(2, 5))),
+        'category': rng.choice(worker.targets['categories']),
+    }, expect=302)
+    worker.member.request('dashboard_home', reverse('dashboard_home'))
+
+
+SCENARIOS = {'browse': browse, 'hot_read': hot_read, 'comment_burst': comment_burst, 'write': write}
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, options, targets, deadline):
+        super().__init__(name=f'load-test-{index}', daemon=True)
+        self.rng = random.Random(f'{options["seed"]}-{index}')
+        self.base_url = options['base_url']
+        self.timeout = options['timeout']
+        self.burst = options['burst']
+        self.mix = options['mix']
+        self.targets = targets
+        self.deadline = deadline
+        self.samples = []
+        self.anonymous = Session(self.base_url, self.samples, self.timeout)
+        self.member = None
+        users = targets['users']
+        self.email = users[index % len(users)] if users else None
+        self.password = options['password']
+
+    def log_in(self):
+        self.member = Session(self.base_url, self.samples, self.timeout)
+        self.member.request('login', reverse('login'))
+        return self.member.request(
+            'login', reverse('login'), {'email': self.email, 'password': self.password}, expect=302)
+
+    def run(self):
+        mix = dict(self.mix)
+        while mix and time.monotonic() < self.deadline:
+            scenario = self.rng.choices(list(mix), list(mix.values()))[0]
+            if scenario in LOGGED_IN_SCENARIOS and self.member is None and not self.log_in():
+                # The failed login is in the report; carry on with anonymous traffic only.
+                mix = {name: weight for name, weight in mix.items() if name not in LOGGED_IN_SCENARIOS}
+                continue
+            SCENARIOS[scenario](self)
+
+
+class LockMonitor(threading.Thread):
+    """Samples PostgreSQL for backends waiting on a lock held by another transaction."""
+
+    def __init__(self, interval):
+        super().__init__(name='load-test-locks', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.samples = 0
+        self.samples_waiting = 0
+        self.peak_waiting = 0
+        self.waits = Counter()
+
+    def run(self):
+        # Connections are per thread, so this one never queues behind the workload's transactions.
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.wait(self.interval):
+                    cursor.execute(LOCK_WAITS_SQL)
+                    rows = cursor.fetchall()
+                    self.samples += 1
+                    self.samples_waiting += bool(rows)
+                    self.peak_waiting = max(self.peak_waiting, len(rows))
+                    for query, locktype, relation in rows:
+                        lock = f'{locktype} on {relation}' if relation else locktype or 'unknown'
+                        self.waits[lock, normalize_statement(query)] += 1
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def report(self):
+        return {
+            'samples': self.samples,
+            'samples_waiting': self.samples_waiting,
+            'peak_waiting': self.peak_waiting,
+            'statements': [
+                {'lock': lock, 'statement': statement, 'wait_seconds': round(count * self.interval, 2)}
+                for (lock, statement), count in self.waits.most_common(10)
+            ],
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a concurrent mix of anonymous browsing, logged-in writes and comment bursts on one hot '
+        'post against a running server, report latency percentiles and throughput per URL name, and '
+        'sample PostgreSQL for lock waits. It creates posts and comments, so point it at a disposable '
+        'database (see seed_data) shared with the server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run for.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Simulated browsers running at once.')
+        parser.add_argument(
+            '--mix', type=parse_mix, default=DEFAULT_MIX,
+            help=f'Weighted scenarios from {", ".join(SCENARIOS)} (default {DEFAULT_MIX}).')
+        parser.add_argument('--hot-post', help='Slug of the post to concentrate reads and comments on.')
+        parser.add_argument('--burst', type=int, default=5, help='Comments per comment_burst.')
+        parser.add_argument('--user-prefix', default='seed', help='Log in as users whose username starts with this.')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds.')
+        parser.add_argument('--lock-interval', type=float, default=0.1, help='Seconds between lock samples.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write results to this JSON file.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency and --duration must be positive.')
+        options['base_url'] = options['base_url'].rstrip('/')
+        targets = self.targets(options)
+
+        probe = []
+        if not Session(options['base_url'], probe, options['timeout']).request('home', reverse('home')):
+            raise CommandError(f'No server answering at {options["base_url"]}.')
+
+        monitor = None
+        if connection.vendor == 'postgresql':
+            monitor = LockMonitor(options['lock_interval'])
+            monitor.start()
+        else:
+            self.stderr.write('Lock contention sampling needs PostgreSQL; skipping it.')
+
+        started = time.monotonic()
+        workers = [Worker(i, options, targets, started + options['duration']) for i in range(options['concurrency'])]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+        if monitor:
+            monitor.stop()
+
+        results = self.summarize([sample for worker in workers for sample in worker.samples], elapsed)
+        report = {
+            'commit': current_commit(),
+            'created_at': timezone.now().isoformat(),
+            'base_url': options['base_url'],
+            'duration': round(elapsed, 2),
+            'concurrency': options['concurrency'],
+            'mix': options['mix'],
+            'hot_post': targets['hot'],
+            'requests': sum(result['requests'] for result in results.values()),
+            'results': results,
+            'lock_waits': monitor.report() if monitor else None,
+        }
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}.'))
+
+    def targets(self, options):
+        posts = Post.objects.filter(is_archived=False).order_by('-views')
+        slugs = list(posts.values_list('slug', flat=True)[:500])
+        if not slugs:
+            raise CommandError('No published posts to request; run seed_data first.')
+        hot = options['hot_post'] or slugs[0]
+        if not Post.objects.filter(slug=hot).exists():
+            raise CommandError(f'No post with slug "{hot}".')
+
+        users = list(
+            User.objects.filter(username__startswith=options['user_prefix'], is_active=True)
+            .exclude(email='').order_by('pk').values_list('email', flat=True)[:options['concurrency']]
+        )
+        if not users and LOGGED_IN_SCENARIOS & set(options['mix']):
+            raise CommandError(
+                f'No users named {options["user_prefix"]}* to log in as; run seed_data '
+                f'or leave {", ".join(sorted(LOGGED_IN_SCENARIOS))} out of --mix.')
+
+        categories = list(Category.objects.values_list('pk', flat=True))
+        if not categories and 'write' in options['mix']:
+            raise CommandError('The write scenario needs at least one category.')
+        return {
+            'slugs': slugs, 'weights': zipf_weights(len(slugs)), 'hot': hot,
+            'users': users, 'categories': categories,
+        }
+
+    def summarize(self, samples, elapsed):
+        by_name = defaultdict(list)
+        for name, ok, ms in samples:
+            by_name[name].append((ok, ms))
+
+        results = {}
+        for name, entries in sorted(by_name.items()):
+            timings = sorted(ms for _, ms in entries)
+            results[name] = {
+                'requests': len(entries),
+                'errors': sum(not ok for ok, _ in entries),
+                'per_second': round(len(entries) / elapsed, 2),
+                'p50_ms': round(percentile(timings, 0.50), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+                'p99_ms': round(percentile(timings, 0.99), 2),
+                'max_ms': round(timings[-1], 2),
+            }
+        return results
+
+    def print_report(self, report):
+        self.stdout.write(
+            f'{"url name":16} {"requests":>8} {"errors":>6} {"req/s":>8} '
+            f'{"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}')
+        for name, result in report['results'].items():
+            line = (
+                f'{name:16} {result["requests"]:8} {result["errors"]:6} {result["per_second"]:8.2f} '
+                f'{result["p50_ms"]:9.2f} {result["p95_ms"]:9.2f} {result["p99_ms"]:9.2f} {result["max_ms"]:9.2f}'
+            )
+            self.stdout.write(self.style.ERROR(line) if result['errors'] else line)
+        self.stdout.write(
+            f'{report["requests"]} requests in {report["duration"]:.1f}s '
+            f'({report["requests"] / report["duration"]:.1f} req/s) with {report["concurrency"]} browsers.')
+
+        locks = report['lock_waits']
+        if locks is None:
+            return
+        if not locks['samples_waiting']:
+            self.stdout.write(self.style.SUCCESS(f'No lock waits seen in {locks["samples"]} samples.'))
+            return
+        self.stdout.write(self.style.WARNING(
+            f'Lock waits in {locks["samples_waiting"]} of {locks["samples"]} samples '
+            f'(up to {locks["peak_waiting"]} backends waiting at once):'))
+        for wait in locks['statements']:
+            self.stdout.write(f'  ~{wait["wait_seconds"]:6.2f}s  {wait["lock"]:28}  {wait["statement"]}')
@@ -0,0 +1,82 @@
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from PIL import UnidentifiedImageError
+
+from core.images import rendition_name, save_rendition_file, store_renditions
+from core.models import ImageRendition
+
+# Uploads from before renditions existed, still stored whole on their row.
+# blog 0019 and accounts 0006 drop these columns once they are empty.
+LEGACY_BLOBS = [
+    # (table, blob column, hash column, rendition kind)
+    ('blog_post', 'cover_image', 'cover_image_hash', 'cover'),
+    ('accounts_profile', 'avatar', 'avatar_hash', 'avatar'),
+]
+
+
+def has_column(table, column):
+    with connection.cursor() as cursor:
+        return any(info.name == column for info in connection.introspection.get_table_description(cursor, table))
+
+
+class Command(BaseCommand):
+    help = (
+        'Render uploads still stored on their post or profile, and move image renditions still held in '
+        'the database into the storage backend. Each batch is committed on its own, so an interrupted '
+        'run can simply be started again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        for table, column, hash_column, kind in LEGACY_BLOBS:
+            if has_column(table, column):
+                self.render_uploads(table, column, hash_column, kind, options['batch_size'])
+
+        queryset = (
+            ImageRendition.objects.filter(data__isnull=False)
+            .only('id', 'source', 'kind', 'width', 'content_type', 'data')
+            .order_by('pk')
+        )
+
+        moved = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            with transaction.atomic():
+                for rendition in batch:
+                    name = rendition_name(rendition.source, rendition.kind, rendition.width, rendition.content_type)
+                    rendition.file = save_rendition_file(name, bytes(rendition.data))
+                    rendition.data = None
+                ImageRendition.objects.bulk_update(batch, ['file', 'data'])
+            moved += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Moved {moved} renditions...')
+
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} renditions to storage.'))
+
+    def render_uploads(self, table, column, hash_column, kind, batch_size):
+        # The model no longer has the blob column, so it is read with plain SQL.
+        select = f'SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY id LIMIT %s'
+        update = f'UPDATE {table} SET {column} = NULL, {hash_column} = %s WHERE id = %s'
+
+        rendered = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(select, [batch_size])
+                batch = cursor.fetchall()
+                for pk, data in batch:
+                    try:
+                        source = store_renditions(ContentFile(bytes(data)), kind)
+                    except (UnidentifiedImageError, OSError):
+                        # Not an image Pillow can read, so there is nothing to show.
+                        source = None
+                    cursor.execute(update, [source, pk])
+            if not batch:
+                break
+            rendered += len(batch)
+            self.stdout.write(f'Rendered {rendered} {kind} images...')
@@ -0,0 +1,253 @@
+import random
+import secrets
+from datetime import timedelta
+from io import BytesIO, StringIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from PIL import Image, ImageDraw
+
+from accounts.models import Profile
+from blog.models import Category, Post, Tag
+from blog.search import post_search_vector
+from comments.models import Comment
+from core.images import store_renditions
+from dashboard.models import DailyPostViews
+
+FIRST_NAMES = [
+    'Ada', 'Grace', 'Alan', 'Linus', 'Margaret', 'Dennis', 'Barbara', 'Ken', 'Radia', 'Guido',
+    'Frances', 'Donald', 'Katherine', 'Edsger', 'Hedy', 'John', 'Sophie', 'Tim', 'Joan', 'Brian',
+]
+LAST_NAMES = [
+    'Lovelace', 'Hopper', 'Turing', 'Torvalds', 'Hamilton', 'Ritchie', 'Liskov', 'Thompson',
+    'Perlman', 'Rossum', 'Allen', 'Knuth', 'Johnson', 'Dijkstra', 'Lamarr', 'McCarthy', 'Wilson',
+]
+CATEGORIES = ['Web Development', 'Databases', 'DevOps', 'Python', 'Design', 'Career', 'Security', 'Data']
+TAGS = [
+    'django', 'postgres', 'python', 'caching', 'performance', 'css', 'javascript', 'docker', 'testing',
+    'linux', 'api', 'sql', 'markdown', 'security', 'tutorial', 'beginners', 'career', 'design',
+    'react', 'redis', 'nginx', 'git', 'orm', 'async', 'search', 'images', 'deployment', 'cloud',
+]
+WORDS = (
+    'the a of to and in that is for it with as on was be by this are from or have an they which one '
+    'you were all we when there can more if no out so said what up its about into than them only '
+    'query index cache server request response database model view template migration deploy test '
+    'latency throughput memory worker process thread lock row table column page user post comment '
+    'simple fast slow better small large first last every other because while before after through'
+).split()
+
+
+def zipf_weights(count, exponent=1.1):
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def sentence(rng, low=6, high=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def paragraph(rng):
+    return ' '.join(sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def markdown_body(rng):
+    blocks = [paragraph(rng)]
+    for _ in range(rng.randint(2, 8)):
+        kind = rng.random()
+        if kind < 0.2:
+            blocks.append(f'## {sentence(rng, 2, 5)[:-1]}')
+        elif kind < 0.35:
+            blocks.append('\n'.join(f'- {sentence(rng, 3, 8)}' for _ in range(rng.randint(2, 5))))
+        elif kind < 0.45:
+            lines = '\n'.join(f'{rng.choice(WORDS)} = {rng.randint(0, 999)}' for _ in range(rng.randint(2, 6)))
+            blocks.append(f'```python\n{lines}\n```')
+        else:
+            text = paragraph(rng)
+            if rng.random() < 0.3:
+                text += f' See [the docs](https://example.com/{rng.choice(WORDS)}) for **more**.'
+            blocks.append(text)
+    return '\n\n'.join(blocks)
+
+
+def image_upload(rng, size, name):
+    image = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        radius = rng.randint(size[1] // 10, size[1] // 2)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate realistic users, posts, tags, categories and threaded comments for benchmarking. '
+        'Authors, views and comments follow long-tailed distributions. Every seeded user has the password "password".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--comments', type=int, default=3000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--images', type=int, default=12, help='Distinct cover images to generate (0 for none).')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Usernames and slugs carry a run token so the command can be run again on the same database.
+        self.run = secrets.token_hex(3)
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            users = self.create_users(rng, options['users'], options['images'])
+            categories = [Category.objects.filter(name=name).first() or Category.objects.create(name=name)
+                          for name in CATEGORIES]
+            tags = [Tag.objects.filter(name=name).first() or Tag.objects.create(name=name) for name in TAGS]
+            posts = self.create_posts(rng, options['posts'], users, categories, tags, options['images'])
+            self.create_comments(rng, options['comments'], posts, users)
+            self.create_daily_views(rng, posts)
+
+        self.stdout.write('Refreshing derived columns...')
+        Post.objects.filter(search_vector=None).update(search_vector=post_search_vector())
+        for command in (
+            'rerender_posts', 'backfill_reading_stats', 'reconcile_comment_counts',
+            'reconcile_post_counts', 'rebuild_author_stats', 'update_trending',
+        ):
+            call_command(command, stdout=self.stdout if options['verbosity'] > 1 else StringIO())
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded {len(users)} users and {len(posts)} posts (run {self.run}).'))
+
+    def create_users(self, rng, count, images):
+        password = make_password('password')
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f'seed{self.run}_{i}', email=f'seed{self.run}_{i}@example.com', password=password,
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    date_joined=self.now - timedelta(days=rng.randint(30, 730)),
+                )
+                for i in range(count)
+            ],
+            batch_size=self.batch_size,
+        )
+        avatars = [
+            store_renditions(image_upload(rng, (400, 400), f'avatar{i}.jpg'), 'avatar')
+            for i in range(min(images, 8))
+        ]
+        Profile.objects.bulk_create(
+            [
+                Profile(
+                    user=user, bio=sentence(rng, 8, 20),
+                    avatar_hash=rng.choice(avatars) if avatars and rng.random() < 0.6 else None,
+                )
+                for user in users
+            ],
+            batch_size=self.batch_size,
+        )
+        self.stdout.write(f'Created {count} users.')
+        return users
+
+    def create_posts(self, rng, count, users, categories, tags, images):
+        covers = [
+            store_renditions(image_upload(rng, (1600, 900), f'cover{i}.jpg'), 'cover')
+            for i in range(images)
+        ]
+        author_weights = zipf_weights(len(users))
+        category_weights = zipf_weights(len(categories), 0.8)
+        tag_weights = zipf_weights(len(tags))
+
+        posts = []
+        for i in range(count):
+            title = sentence(rng, 3, 8)[:-1].title()
+            posts.append(Post(
+                author=rng.choices(users, cum_weights=author_weights)[0],
+                title=title,
+                slug=f'{slugify(title)[:150]}-{self.run}-{i}',
+                excerpt=sentence(rng, 12, 30),
+                content=markdown_body(rng),
+                category=rng.choices(categories, cum_weights=category_weights)[0],
+                cover_image_hash=rng.choice(covers) if covers and rng.random() < 0.7 else None,
+                views=int(rng.paretovariate(1.2) * 20),
+                is_archived=rng.random() < 0.08,
+            ))
+        posts = Post.objects.bulk_create(posts, batch_size=self.batch_size)
+
+        # auto_now_add ignores assigned values on insert, so the spread is applied afterwards.
+        for post in posts:
+            post.created_at = self.now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        Post.objects.bulk_update(posts, ['created_at'], batch_size=self.batch_size)
+
+        Post.tags.through.objects.bulk_create(
+            [
+                Post.tags.through(post_id=post.pk, tag_id=tag.pk)
+                for post in posts
+                for tag in {rng.choices(tags, cum_weights=tag_weights)[0] for _ in range(rng.randint(0, 4))}
+            ],
+            batch_size=self.batch_size,
+        )
+        self.stdout.write(f'Created {count} posts.')
+        return posts
+
+    def create_comments(self, rng, count, posts, users):
+        # Busy posts attract most of the discussion.
+        post_weights = list(accumulate(post.views + 1 for post in posts))
+        top_level_count = count * 3 // 5
+        thread = Comment.objects.bulk_create(
+            [
+                Comment(
+                    user=rng.choice(users), post=rng.choices(posts, cum_weights=post_weights)[0],
+                    content=paragraph(rng),
+                )
+                for _ in range(top_level_count)
+            ],
+            batch_size=self.batch_size,
+        )
+        created = [thread]
+
+        # Each round replies to the previous one with half as many comments,
+        # so threads thin out a few levels deep.
+        remaining = count - top_level_count
+        while remaining and thread:
+            size = min(remaining, max(1, len(thread) // 2))
+            parents = [rng.choice(thread) for _ in range(size)]
+            thread = Comment.objects.bulk_create(
+                [
+                    Comment(user=rng.choice(users), post_id=parent.post_id, parent=parent, content=sentence(rng))
+                    for parent in parents
+                ],
+                batch_size=self.batch_size,
+            )
+            created.append(thread)
+            remaining -= size
+
+        # Replies come after their parent, which comes after its post.
+        posted_at = {post.pk: post.created_at for post in posts}
+        for comment in (comment for level in created for comment in level):
+            start = comment.parent.created_at if comment.parent else posted_at[comment.post_id]
+            comment.created_at = start + (self.now - start) * rng.random() ** 3
+        Comment.objects.bulk_update(
+            [comment for level in created for comment in level], ['created_at'], batch_size=self.batch_size)
+        self.stdout.write(f'Created {count - remaining} comments.')
+
+    def create_daily_views(self, rng, posts):
+        today = timezone.localdate()
+        rows = {}
+        for post in posts:
+            for _ in range(min(post.views, 30)):
+                day = max(today - timedelta(days=int(rng.expovariate(1 / 20)) % 90), timezone.localdate(post.created_at))
+                key = (post.pk, day)
+                if key not in rows:
+                    rows[key] = DailyPostViews(post_id=post.pk, author_id=post.author_id, day=day, views=0)
+                rows[key].views += max(1, post.views // 30)
+        DailyPostViews.objects.bulk_create(rows.values(), batch_size=self.batch_size)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=64)),
+                ('kind', models.CharField(max_length=20)),
+                ('width', models.PositiveSmallIntegerField()),
+                ('content_type', models.CharField(max_length=50)),
+                ('data', models.BinaryField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'kind', 'width'), name='core_rendition_unique')],
+            },
+        ),
+    ]
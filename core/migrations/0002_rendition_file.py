@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagerendition',
+            name='file',
+            field=models.FileField(blank=True, max_length=200, upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='imagerendition',
+            name='data',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -1,3 +1,20 @@
 from django.db import models
 
-# Create your models here.
+
+class ImageRendition(models.Model):
+    # sha256 of the uploaded original, shared by every upload of the same bytes.
+    source = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20)
+    width = models.PositiveSmallIntegerField()
+    content_type = models.CharField(max_length=50)
+    file = models.FileField(max_length=200, blank=True)
+    # Rows created before images moved to storage; emptied by migrate_image_blobs.
+    data = models.BinaryField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'kind', 'width'], name='core_rendition_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.width}w {self.source[:12]}'
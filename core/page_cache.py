@@ -0,0 +1,81 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+GENERATION_KEY = 'page_cache:generation'
+
+
+def page_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_page_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def page_cache_key(request, params=()):
+    # Built from known parameters only, in a fixed order, so equivalent URLs share an entry.
+    query = urlencode(sorted((name, value) for name in params for value in request.GET.getlist(name)))
+    path = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'page_cache:{page_generation()}:{path}'
+
+
+def is_cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def is_cacheable_response(request, response):
+    # A page that used the CSRF token or sets cookies is specific to this visitor.
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+class AnonymousPageCacheMixin:
+    """Serve whole pages to anonymous visitors from the cache.
+
+    Entries are keyed on a generation counter that content signals bump, so a
+    change invalidates every cached page at once; the timeout is only a backstop.
+    Requests with query parameters outside ``page_cache_params`` are never
+    cached, so arbitrary query strings cannot fill the cache.
+    """
+
+    page_cache_params = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable_request(request) or not request.GET.keys() <= set(self.page_cache_params):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request, self.page_cache_params)
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+
+        def store(response):
+            if is_cacheable_response(request, response):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
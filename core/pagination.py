@@ -0,0 +1,66 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import InvalidPage
+from django.db.models import F
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+
+
+def encode_cursor(obj):
+    value = f'{obj.created_at.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidPage('Invalid cursor.')
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class CursorPaginator:
+    """Keyset pagination over (created_at, id), newest first unless ascending.
+
+    Each page seeks from the last row of the previous one instead of using
+    OFFSET, so deep pages cost the same as the first.
+    """
+
+    def __init__(self, queryset, per_page, ascending=False):
+        if ascending:
+            self.queryset = queryset.order_by('created_at', 'pk')
+        else:
+            self.queryset = queryset.order_by('-created_at', '-pk')
+        self.per_page = per_page
+        self.ascending = ascending
+
+    def seek(self, cursor=None):
+        if not cursor:
+            return self.queryset
+        # A row comparison, unlike the equivalent OR, gives the index a start key to seek to.
+        after = TupleGreaterThan if self.ascending else TupleLessThan
+        return self.queryset.filter(after(Tuple(F('created_at'), F('pk')), decode_cursor(cursor)))
+
+    def page(self, cursor=None):
+        object_list = list(self.seek(cursor)[:self.per_page + 1])
+        next_cursor = None
+        if len(object_list) > self.per_page:
+            object_list = object_list[:self.per_page]
+            next_cursor = encode_cursor(object_list[-1])
+        return CursorPage(object_list, next_cursor)
@@ -0,0 +1,67 @@
+import hashlib
+import math
+
+
+def hash64(value):
+    return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+
+class BloomFilter:
+    """Fixed-size set membership test with false positives but no false negatives."""
+
+    def __init__(self, data=None, size=2048, hashes=3):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(data) if data else bytearray(size // 8)
+
+    def positions(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=4 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], 'big') % self.size
+
+    def __contains__(self, value):
+        return all(self.bits[pos // 8] & (1 << pos % 8) for pos in self.positions(value))
+
+    def add(self, value):
+        for pos in self.positions(value):
+            self.bits[pos // 8] |= 1 << pos % 8
+
+    def fill_ratio(self):
+        return sum(byte.bit_count() for byte in self.bits) / self.size
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+
+class HyperLogLog:
+    """Approximate distinct count in ``2 ** precision`` bytes; sketches merge by taking the maximum."""
+
+    def __init__(self, registers=None, precision=10):
+        self.precision = precision
+        self.registers = bytearray(registers) if registers else bytearray(1 << precision)
+
+    def add(self, value):
+        """Add ``value``; return whether the sketch changed."""
+        hashed = hash64(value)
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - remainder.bit_length() + 1
+        if rank <= self.registers[index]:
+            return False
+        self.registers[index] = rank
+        return True
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is more accurate while many registers are unset.
+            estimate = m * math.log(m / empty)
+        return round(estimate)
+
+    def to_bytes(self):
+        return bytes(self.registers)
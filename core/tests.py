@@ -1,3 +1,504 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from blog.models import Category, Post, Tag
+from blog.search import post_search_vector, search_posts
+from blog.trending import trending_candidates
+from blog.view_counts import counters, flush_views, record_view
+from comments.models import Comment
+from comments.threads import thread_queryset
+from dashboard.models import DailyPostViews
+from PIL import Image
+
+from .identifiers import next_available, save_unique
+from .management.commands.load_test import LockMonitor
+from .images import (
+    RENDITION_TYPE, RENDITIONS, rendition_name, rendition_url, store_renditions, validate_image_upload,
+)
+from .models import ImageRendition
+from .page_cache import bump_page_generation, page_generation
+from .pagination import CursorPaginator, encode_cursor
+from .sketches import BloomFilter, HyperLogLog
+
+
+def image_upload(size=(2400, 1200), color='red', name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            'writer', 'writer@example.com', 'password', first_name='Ada', last_name='Writer')
+        Profile.objects.create(user=cls.author)
+        cls.post = Post.objects.create(author=cls.author, title='Cached', content='Body')
+        cls.tag = Tag.objects.create(name='python')
+        cls.post.tags.add(cls.tag)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for url in (reverse('home'), reverse('blog_home')):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertContains(response, 'Cached')
+
+    def test_only_known_query_parameters_are_cached(self):
+        url = reverse('blog_home')
+        self.client.get(url, {'tag': self.tag.pk, 'q': 'cached'})
+        with self.assertNumQueries(0):
+            self.client.get(url, {'q': 'cached', 'tag': self.tag.pk})
+
+        self.client.get(url, {'utm_source': 'feed'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'utm_source': 'feed'})
+        self.assertTrue(queries)
+
+    def test_authenticated_pages_are_not_cached(self):
+        self.client.force_login(self.author)
+        self.client.get(reverse('blog_home'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('blog_home'))
+        self.assertTrue(queries)
+
+    def test_content_changes_invalidate_pages(self):
+        self.client.get(reverse('blog_home'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.author, title='Fresh post', content='Body')
+        self.assertContains(self.client.get(reverse('blog_home')), 'Fresh post')
+
+    def test_view_flushes_leave_pages_cached(self):
+        counters.clear()
+        generation = page_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            record_view(self.post.pk)
+            record_view(self.post.pk)
+            self.assertEqual(flush_views(), 1)
+        self.assertEqual(page_generation(), generation)
+
+    def test_card_fragment_is_reused_when_counts_change(self):
+        url = reverse('blog_home')
+        self.client.get(url)
+        post = Post.objects.select_related('author__profile').get(pk=self.post.pk)
+        fragment = make_template_fragment_key(
+            'post_card', [post.pk, post.updated_at, post.author.profile.updated_at, ''])
+        self.assertIsNotNone(cache.get(fragment))
+
+        Post.objects.filter(pk=post.pk).update(views=4242)
+        bump_page_generation()
+        self.assertContains(self.client.get(url), '4242')
+        self.assertIsNotNone(cache.get(fragment))
+
+    def test_card_fragment_follows_related_changes(self):
+        self.assertContains(self.client.get(reverse('blog_home')), '#python')
+
+        self.tag.name = 'django'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.save()
+        self.assertContains(self.client.get(reverse('blog_home')), '#django')
+
+        self.author.first_name = 'Grace'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        self.assertContains(self.client.get(reverse('blog_home')), 'Grace Writer')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked against PostgreSQL.')
+class QueryPlanTests(TestCase):
+    """Hot queries must be answerable from an index.
+
+    Sequential scans are disabled so the planner picks an index whenever one
+    fits, however little data there is; a Seq Scan in the plan means none does.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        Profile.objects.create(user=cls.author)
+        cls.category = Category.objects.create(name='Django')
+        cls.tag = Tag.objects.create(name='python')
+        cls.post = Post.objects.create(author=cls.author, title='Indexed', content='Body', category=cls.category)
+        cls.post.tags.add(cls.tag)
+        cls.comment = Comment.objects.create(user=cls.author, post=cls.post, content='Root')
+        Comment.objects.create(user=cls.author, post=cls.post, parent=cls.comment, content='Reply')
+        others = User.objects.bulk_create(User(username=f'other{i}') for i in range(20))
+        # A busy thread, so the thread queries are planned against realistic comment statistics.
+        roots = Comment.objects.bulk_create(
+            Comment(user=others[i % 20], post=cls.post, content='Filler') for i in range(1000))
+        Comment.objects.bulk_create(
+            Comment(user=others[i % 20], post=cls.post, parent=roots[i % 1000], content='Filler')
+            for i in range(2000)
+        )
+        Post.objects.bulk_create(
+            Post(author=others[i % 20], title=f'Filler {i}', slug=f'filler-{i}', content='Body', is_archived=i % 5 == 0)
+            for i in range(2000)
+        )
+        Post.objects.update(search_vector=post_search_vector())
+        DailyPostViews.objects.bulk_create(
+            DailyPostViews(post=post, author_id=post.author_id, day=date(2025, 1, 1) + timedelta(days=i % 90), views=i)
+            for i, post in enumerate(Post.objects.all())
+        )
+        with connection.cursor() as cursor:
+            # Bulk writes sit in the GIN pending list, which makes the index look expensive.
+            cursor.execute("SELECT gin_clean_pending_list('blog_post_search_gin')")
+            cursor.execute('ANALYZE blog_post, blog_post_tags, comments_comment, dashboard_dailypostviews')
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertIndexed(self, queryset, index=None):
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan', plan, plan)
+        if index:
+            self.assertIn(index, plan, plan)
+
+    def test_blog_listing(self):
+        posts = Post.objects.for_cards().filter(is_archived=False)
+        self.assertIndexed(posts.order_by('-created_at', '-id')[:13], 'blog_post_published_recent')
+        self.assertIndexed(
+            posts.filter(category=self.category).order_by('-created_at')[:13], 'blog_post_category_listing')
+        self.assertIndexed(posts.with_tags([self.tag.pk]).order_by('-created_at', '-id')[:13])
+        self.assertIndexed(posts.with_tags([self.tag.pk], match_all=True).order_by('-created_at', '-id')[:13])
+
+    def test_cursor_pages_seek_the_index(self):
+        posts = Post.objects.for_cards().filter(is_archived=False)
+        middle = posts.order_by('-created_at', '-id')[1000]
+        plan = CursorPaginator(posts, 12).seek(encode_cursor(middle))[:13].explain()
+        self.assertIn('Index Scan using blog_post_published_recent', plan, plan)
+        self.assertRegex(plan, r'Index Cond: \(ROW\(created_at, id\) < ROW\(', plan)
+
+        replies = thread_queryset().filter(parent=self.comment)
+        plan = CursorPaginator(replies, 10, ascending=True).seek(encode_cursor(replies.first()))[:11].explain()
+        self.assertRegex(plan, r'Index Cond: \(\(parent_id = \d+\) AND \(ROW\(created_at, id\) > ROW\(', plan)
+
+    def test_home_featured(self):
+        posts = Post.objects.for_cards().filter(is_archived=False)
+        self.assertIndexed(posts.order_by('-trending_score', '-created_at')[:3], 'blog_post_published_trending')
+
+    def test_trending_candidates(self):
+        self.assertIndexed(trending_candidates(timezone.now()).values_list('pk', 'created_at', 'trending_score'))
+
+    def test_author_listing(self):
+        posts = Post.objects.filter(author=self.author, is_archived=False).order_by('-created_at', '-id')
+        self.assertIndexed(posts[:13], 'blog_post_author_listing')
+        self.assertIndexed(Post.objects.filter(author=self.author).order_by('-created_at')[:5])
+
+    def test_search(self):
+        self.assertIndexed(search_posts(Post.objects.filter(is_archived=False), 'indexed'), 'blog_post_search_gin')
+
+    def test_comment_threads(self):
+        top_level = thread_queryset().filter(post=self.post, parent=None).order_by('-created_at', '-id')
+        self.assertIndexed(top_level[:20], 'comments_top_level')
+        replies = thread_queryset().filter(parent=self.comment).order_by('created_at', 'pk')
+        self.assertIndexed(replies[:11], 'comments_replies')
+
+    def test_author_stats_comment_counts(self):
+        self.assertIndexed(Comment.objects.filter(post__author_id=self.author.pk).values('pk'))
+        self.assertIndexed(Comment.objects.filter(user_id=self.author.pk).values('pk'))
+
+    def test_dashboard_view_history(self):
+        history = (
+            DailyPostViews.objects.filter(author=self.author, day__gte=date(2025, 2, 1))
+            .values('day').annotate(views=Sum('views')).values_list('day', 'views').order_by()
+        )
+        self.assertIndexed(history, 'Index Only Scan using dashboard_daily_author_day')
+
+
+class IdentifierTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        for slug in ('hello', 'hello-1', 'hello-7', 'hello-world', 'hello-x2'):
+            Post.objects.create(author=cls.author, title='Hello', slug=slug, content='Body')
+
+    def test_next_available_uses_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(next_available(Post.objects.all(), 'slug', 'hello'), 'hello-8')
+        self.assertEqual(next_available(Post.objects.all(), 'slug', 'fresh'), 'fresh')
+        self.assertEqual(next_available(Post.objects.all(), 'slug', 'hello', max_length=6), 'hell')
+
+    def test_save_unique_retries_after_a_clash(self):
+        post = Post(author=self.author, title='Hello', slug='hello', content='Body')
+        save_unique(post, 'slug', 'hello', post.save)
+        self.assertEqual(post.slug, 'hello-8')
+        self.assertEqual(Post.objects.filter(slug='hello-8').count(), 1)
+
+
+class ImageRenditionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_covers_are_downscaled_to_each_width(self):
+        source = store_renditions(image_upload(), 'cover')
+
+        renditions = ImageRendition.objects.filter(source=source, kind='cover').order_by('width')
+        self.assertEqual([r.width for r in renditions], list(RENDITIONS['cover']))
+        for rendition in renditions:
+            self.assertIsNone(rendition.data)
+            with Image.open(rendition.file) as image:
+                self.assertEqual(image.size, (rendition.width, rendition.width // 2))
+                self.assertEqual(Image.MIME[image.format], RENDITION_TYPE)
+
+    def test_small_images_are_not_upscaled(self):
+        source = store_renditions(image_upload(size=(300, 200)), 'cover')
+
+        rendition = ImageRendition.objects.get(source=source, kind='cover', width=1600)
+        with Image.open(rendition.file) as image:
+            self.assertEqual(image.size, (300, 200))
+
+    def test_avatars_are_cropped_square(self):
+        source = store_renditions(image_upload(), 'avatar')
+
+        rendition = ImageRendition.objects.get(source=source, kind='avatar', width=64)
+        with Image.open(rendition.file) as image:
+            self.assertEqual(image.size, (64, 64))
+
+    def test_identical_uploads_share_renditions(self):
+        first = store_renditions(image_upload(name='a.png'), 'cover')
+        with self.assertNumQueries(1):
+            second = store_renditions(image_upload(name='b.png'), 'cover')
+
+        self.assertEqual(first, second)
+        self.assertEqual(ImageRendition.objects.count(), len(RENDITIONS['cover']))
+
+    def test_files_are_named_by_content(self):
+        source = store_renditions(image_upload(), 'cover')
+        ImageRendition.objects.all().delete()
+        store_renditions(image_upload(), 'cover')
+
+        rendition = ImageRendition.objects.get(source=source, width=480)
+        self.assertEqual(rendition.file.name, rendition_name(source, 'cover', 480))
+        self.assertEqual(len(default_storage.listdir(f'renditions/cover/480/{source[:2]}')[1]), 1)
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_uploads_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            validate_image_upload(SimpleUploadedFile('big.png', b'0' * 2048, content_type='image/png'))
+
+    def test_rendition_view_is_immutable(self):
+        user = User.objects.create_user('writer', 'writer@example.com', 'password')
+        post = Post(author=user, title='Covered', content='Body')
+        post.set_cover_image(image_upload())
+        post.save()
+
+        response = self.client.get(post.get_cover_image_url())
+
+        self.assertEqual(response['Content-Type'], RENDITION_TYPE)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(' 480w', post.get_cover_image_srcset())
+
+        with self.assertNumQueries(0):
+            response = self.client.get(post.get_cover_image_url(), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_avatar_is_served_immutable_and_revalidated(self):
+        user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        profile = Profile(user=user)
+        profile.set_avatar(image_upload())
+        profile.save()
+
+        response = self.client.get(profile.get_avatar_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(profile.get_avatar_url(), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_renditions_are_not_found(self):
+        source = store_renditions(image_upload(), 'avatar')
+
+        self.assertEqual(self.client.get(rendition_url('0' * 64, 'avatar')).status_code, 404)
+        self.assertEqual(self.client.get(rendition_url(source, 'avatar', 999)).status_code, 404)
+        self.assertEqual(self.client.get(rendition_url(source, 'cover')).status_code, 404)
+
+    def test_database_blobs_are_moved_to_storage(self):
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'blue').save(buffer, 'JPEG')
+        legacy = ImageRendition.objects.bulk_create(
+            ImageRendition(source=f'{i:064x}', kind='avatar', width=64, content_type='image/jpeg', data=buffer.getvalue())
+            for i in range(3)
+        )
+
+        call_command('migrate_image_blobs', batch_size=2, stdout=StringIO())
+        call_command('migrate_image_blobs', stdout=StringIO())
+
+        for rendition in ImageRendition.objects.filter(pk__in=[r.pk for r in legacy]):
+            self.assertIsNone(rendition.data)
+            self.assertTrue(rendition.file.name.endswith('.jpg'))
+            self.assertEqual(rendition.file.read(), buffer.getvalue())
+        response = self.client.get(rendition_url(legacy[0].source, 'avatar', 64))
+        self.assertEqual(b''.join(response.streaming_content), buffer.getvalue())
+
+    def test_uploads_stored_on_posts_are_rendered_before_the_column_is_dropped(self):
+        with connection.cursor() as cursor:
+            # Recreate the column 0019 dropped, as on a database that predates renditions.
+            cursor.execute('ALTER TABLE blog_post ADD COLUMN cover_image bytea NULL')
+        author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        post = Post.objects.create(author=author, title='Legacy', content='Body')
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE blog_post SET cover_image = %s WHERE id = %s', [image_upload().read(), post.pk])
+        check_covers_rendered = import_module('blog.migrations.0019_remove_post_cover_image').check_covers_rendered
+        schema_editor = SimpleNamespace(connection=connection)
+        with self.assertRaisesMessage(RuntimeError, 'migrate_image_blobs'):
+            check_covers_rendered(None, schema_editor)
+
+        call_command('migrate_image_blobs', stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(
+            ImageRendition.objects.filter(source=post.cover_image_hash, kind='cover').count(), len(RENDITIONS['cover']))
+        check_covers_rendered(None, schema_editor)
+
+
+class SketchTests(TestCase):
+    def test_hyperloglog_estimates_and_merges(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(6000):
+            first.add(f'visitor-{i}')
+        for i in range(3000, 9000):
+            second.add(f'visitor-{i}')
+        self.assertAlmostEqual(first.count(), 6000, delta=600)
+
+        first.merge(second)
+        self.assertAlmostEqual(first.count(), 9000, delta=900)
+        self.assertEqual(HyperLogLog(first.to_bytes()).count(), first.count())
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter()
+        for i in range(200):
+            bloom.add(i)
+        self.assertTrue(all(i in bloom for i in range(200)))
+        self.assertLess(sum(i in bloom for i in range(1000, 2000)), 50)
+        self.assertIn(5, BloomFilter(bloom.to_bytes()))
+
+
+class SeedAndBenchmarkTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_seeded_data_is_consistent_and_benchmarked(self):
+        call_command('seed_data', users=6, posts=30, comments=60, images=1, stdout=StringIO())
+
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertFalse(Post.objects.annotate(actual=Count('comments')).exclude(comment_count=F('actual')).exists())
+        self.assertFalse(Post.objects.filter(content_html='').exists())
+        self.assertFalse(Comment.objects.filter(created_at__lt=F('post__created_at')).exists())
+        self.assertFalse(Comment.objects.filter(created_at__lt=F('parent__created_at')).exists())
+        self.assertTrue(Comment.objects.filter(parent__parent__isnull=False).exists())
+
+        output = os.path.join(tempfile.mkdtemp(), 'results.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        call_command('benchmark_views', runs=2, output=output, stdout=StringIO())
+
+        with open(output) as f:
+            report = json.load(f)
+        self.assertEqual(
+            set(report['results']), {'blog_home', 'post_detail', 'post_comments', 'user_profile', 'dashboard'})
+        for result in report['results'].values():
+            self.assertGreater(result['peak_kib'], 0)
+            self.assertLessEqual(result['median_ms'], result['max_ms'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Lock waits are sampled from PostgreSQL.')
+@override_settings(SOCIALACCOUNT_PROVIDERS={'google': {'APP': {'client_id': 'test', 'secret': 'test'}}})
+class LoadTestTests(LiveServerTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_mixed_workload_is_reported_per_url_name(self):
+        call_command('seed_data', users=4, posts=10, comments=20, images=0, stdout=StringIO())
+        hot = Post.objects.filter(is_archived=False).order_by('-views').first()
+        posts = Post.objects.count()
+
+        output = os.path.join(tempfile.mkdtemp(), 'results.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        call_command(
+            'load_test', '--mix=browse=1,comment_burst=1,write=1', base_url=self.live_server_url,
+            duration=3, concurrency=2, burst=2, output=output, stdout=StringIO())
+
+        with open(output) as f:
+            report = json.load(f)
+        results = report['results']
+        self.assertLessEqual(
+            {'login POST', 'blog_home', 'post_detail', 'add_comment POST', 'write_blog POST'}, set(results))
+        for result in results.values():
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+            self.assertLessEqual(result['p99_ms'], result['max_ms'])
+        self.assertEqual(report['hot_post'], hot.slug)
+        self.assertEqual(
+            Comment.objects.filter(post=hot).count() - hot.comment_count, results['add_comment POST']['requests'])
+        self.assertEqual(Post.objects.count() - posts, results['write_blog POST']['requests'])
+        self.assertIsNotNone(report['lock_waits'])
+
+    def test_lock_monitor_reports_blocked_update(self):
+        user = User.objects.create_user(username='author', password='secret123')
+        post = Post.objects.create(author=user, title='Hot', excerpt='Excerpt', content='Content')
+        monitor = LockMonitor(0.05)
+        monitor.start()
+
+        def count_view():
+            try:
+                Post.objects.filter(pk=post.pk).update(views=F('views') + 1)
+            finally:
+                connection.close()
+
+        viewer = threading.Thread(target=count_view)
+        with transaction.atomic():
+            Post.objects.select_for_update().get(pk=post.pk)
+            viewer.start()
+            time.sleep(0.5)
+        viewer.join()
+        monitor.stop()
+
+        report = monitor.report()
+        self.assertGreater(report['samples_waiting'], 0)
+        self.assertEqual(report['peak_waiting'], 1)
+        self.assertIn('UPDATE "blog_post" SET "views"', report['statements'][0]['statement'])
@@ -5,4 +5,5 @@ urlpatterns = [
     path('', views.HomePageView.as_view(), name='home'),
     path('about/', views.AboutPageView.as_view(), name='about'),
     path('contact/', views.ContactPageView.as_view(), name='contact'),
+    path('images/<str:kind>/<int:width>/<str:source>/', views.ImageRenditionView.as_view(), name='image_rendition'),
 ]
\ No newline at end of file
@@ -1,15 +1,22 @@
+from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
 from django.views.generic import TemplateView
 from blog.models import Post
+from .images import rendition_response
+from .models import ImageRendition
+from .page_cache import AnonymousPageCacheMixin
 
 
-class HomePageView(TemplateView):
+class HomePageView(AnonymousPageCacheMixin, TemplateView):
     template_name = 'core/home.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['featured_posts'] = Post.objects.all().order_by('-views')[:3]
-        context['latest_posts'] = Post.objects.all().order_by(
-            '-created_at')[:6]
+        posts = Post.objects.for_cards().filter(is_archived=False)
+        context['featured_posts'] = posts.order_by('-trending_score', '-created_at')[:3]
+        context['latest_posts'] = posts.order_by('-created_at', '-id')[:6]
         return context
 
 
@@ -19,3 +26,16 @@ class AboutPageView(TemplateView):
 
 class ContactPageView(TemplateView):
     template_name = 'core/contact.html'
+
+
+def rendition_etag(request, kind, width, source):
+    # The URL names the content hash, so the ETag needs no database lookup.
+    return f'{source}-{kind}-{width}'
+
+
+@method_decorator(condition(etag_func=rendition_etag), name='get')
+class ImageRenditionView(View):
+    def get(self, request, kind, width, source):
+        rendition = get_object_or_404(
+            ImageRendition.objects.only('content_type', 'file', 'data'), source=source, kind=kind, width=width)
+        return rendition_response(rendition)
@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import AuthorStats
 
-# Register your models here.
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'post_count', 'archived_post_count', 'total_views', 'comments_received', 'comments_written']
+    search_fields = ['user__username', 'user__email']
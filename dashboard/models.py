@@ -1,3 +1,91 @@
-from django.db import models
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import Count, F, Q, Sum
 
-# Create your models here.
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='author_stats')
+    post_count = models.IntegerField(default=0)
+    archived_post_count = models.IntegerField(default=0)
+    total_views = models.BigIntegerField(default=0)
+    comments_received = models.IntegerField(default=0)
+    comments_written = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'author stats'
+
+    def __str__(self):
+        return f"{self.user.username}'s Stats"
+
+    @classmethod
+    def compute(cls, user_id):
+        from blog.models import Post
+        from comments.models import Comment
+
+        post_stats = Post.objects.filter(author_id=user_id).aggregate(
+            post_count=Count('id', filter=Q(is_archived=False)),
+            archived_post_count=Count('id', filter=Q(is_archived=True)),
+            total_views=Sum('views', filter=Q(is_archived=False), default=0),
+        )
+        # Two counts, each answered from its own foreign key index.
+        return {
+            **post_stats,
+            'comments_received': Comment.objects.filter(post__author_id=user_id).count(),
+            'comments_written': Comment.objects.filter(user_id=user_id).count(),
+        }
+
+    @classmethod
+    def rebuild(cls, user_id):
+        stats, _ = cls.objects.update_or_create(user_id=user_id, defaults=cls.compute(user_id))
+        return stats
+
+    @classmethod
+    def for_user(cls, user):
+        try:
+            return cls.objects.get(user=user)
+        except cls.DoesNotExist:
+            return cls.rebuild(user.pk)
+
+    @classmethod
+    def bump(cls, user_id, **deltas):
+        # Rows are only created by rebuild(), which reads the current totals,
+        # so a missing row is simply built on its next read.
+        deltas = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if deltas:
+            cls.objects.filter(user_id=user_id).update(**deltas)
+
+
+class DailyPostViews(models.Model):
+    """Views per post per day, written by the view-count flush."""
+
+    pk = models.CompositePrimaryKey('post_id', 'day')
+    post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, db_index=False, related_name='+')
+    # Copied from the post so per-author ranges never join blog_post.
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False, related_name='+')
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'daily post views'
+        indexes = [
+            # Covers the dashboard's range query so it is answered from the index alone.
+            models.Index(fields=['author', 'day'], include=['views'], name='dashboard_daily_author_day'),
+        ]
+
+    @classmethod
+    def record(cls, day, counts):
+        """Add ``counts`` ({post_id: views}) to the rows for ``day``."""
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (post_id, author_id, day, views)
+                SELECT post.id, post.author_id, %s, counts.views
+                FROM unnest(%s::bigint[], %s::integer[]) AS counts(post_id, views)
+                JOIN blog_post post ON post.id = counts.post_id
+                ON CONFLICT (post_id, day) DO UPDATE SET views = {table}.views + EXCLUDED.views
+                """,
+                [day, list(counts), list(counts.values())],
+            )
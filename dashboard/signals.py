@@ -0,0 +1,91 @@
+from collections import Counter, defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog.models import Post
+from blog.signals import post_views_flushed
+from comments.models import Comment
+from .models import AuthorStats, DailyPostViews
+
+
+def post_deltas(is_archived, views, sign):
+    if is_archived:
+        return {'archived_post_count': sign}
+    return {'post_count': sign, 'total_views': sign * views}
+
+
+def deleted_post_authors(origin):
+    """Post author ids for the comments one ``delete()`` call removes, keyed by post id."""
+    authors = origin.__dict__.setdefault('_comment_post_authors', {})
+    if isinstance(origin, Post):
+        authors[origin.pk] = origin.author_id
+    return authors
+
+
+def comment_post_author_id(comment, origin=None):
+    if Comment.post.is_cached(comment):
+        return comment.post.author_id
+    if origin is None:
+        return Post.objects.filter(pk=comment.post_id).values_list('author_id', flat=True).first()
+    # Cascades send pre_delete for every comment before the first post_delete,
+    # so the posts still unresolved are all looked up in one query.
+    authors = deleted_post_authors(origin)
+    if authors.get(comment.post_id) is None:
+        unresolved = [pk for pk, author_id in authors.items() if author_id is None] or [comment.post_id]
+        authors.update(Post.objects.filter(pk__in=unresolved).values_list('pk', 'author_id'))
+    return authors.get(comment.post_id)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.bump(instance.author_id, **post_deltas(instance.is_archived, instance.views, 1))
+        return
+
+    was_archived = instance.get_loaded_value('is_archived')
+    if was_archived is not None and was_archived != instance.is_archived:
+        deltas = Counter(post_deltas(instance.is_archived, instance.views, 1))
+        deltas.update(post_deltas(was_archived, instance.views, -1))
+        AuthorStats.bump(instance.author_id, **deltas)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    AuthorStats.bump(instance.author_id, **post_deltas(instance.is_archived, instance.views, -1))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.bump(instance.user_id, comments_written=1)
+        AuthorStats.bump(comment_post_author_id(instance), comments_received=1)
+
+
+@receiver(pre_delete, sender=Comment)
+def comment_deleting(sender, instance, origin, **kwargs):
+    if not Comment.post.is_cached(instance):
+        deleted_post_authors(origin).setdefault(instance.post_id, None)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin, **kwargs):
+    AuthorStats.bump(instance.user_id, comments_written=-1)
+    AuthorStats.bump(comment_post_author_id(instance, origin), comments_received=-1)
+
+
+@receiver(post_views_flushed)
+def views_flushed(sender, counts, **kwargs):
+    views_by_author = defaultdict(int)
+    published = Post.objects.filter(pk__in=counts, is_archived=False).values_list('pk', 'author_id')
+    for pk, author_id in published:
+        views_by_author[author_id] += counts[pk]
+    for author_id, views in views_by_author.items():
+        AuthorStats.bump(author_id, total_views=views)
+
+
+@receiver(post_views_flushed)
+def record_daily_views(sender, counts, **kwargs):
+    # Views are dated by the flush, at most POST_VIEW_FLUSH_INTERVAL after they happened.
+    DailyPostViews.record(timezone.localdate(), counts)
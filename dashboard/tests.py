@@ -1,3 +1,159 @@
+from io import StringIO
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from blog.navigation import get_navigation
+from blog.view_counts import counters, flush_views, record_view
+from comments.models import Comment
+from .models import AuthorStats, DailyPostViews
+from .views import last_months, view_history
+
+
+class DashboardHomeViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer', 'writer@example.com', 'password')
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        for i in range(6):
+            post = Post.objects.create(
+                author=cls.user, title=f'Post {i}', content='Body', views=10, is_archived=i == 0)
+            Comment.objects.create(user=reader, post=post, content='Nice')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_stats(self):
+        response = self.client.get(reverse('dashboard_home'))
+        self.assertEqual(response.context['total_posts'], 5)
+        self.assertEqual(response.context['archived_posts'], 1)
+        self.assertEqual(response.context['total_views'], 50)
+        self.assertEqual(response.context['total_comments'], 6)
+        self.assertEqual(response.context['monthly_data'][-1]['count'], 6)
+
+    def test_query_count(self):
+        AuthorStats.for_user(self.user)
+        get_navigation()
+        # session, user, author stats, monthly counts, view history, recent posts
+        with self.assertNumQueries(6):
+            self.client.get(reverse('dashboard_home'))
+
+    def test_last_months_uses_calendar_months(self):
+        months = last_months(datetime(2025, 3, 31, tzinfo=dt_timezone.utc))
+        self.assertEqual(len(months), 12)
+        self.assertEqual(months[0], (2024, 4))
+        self.assertEqual(months[-3:], [(2025, 1), (2025, 2), (2025, 3)])
+
+
+class ViewHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.posts = [Post.objects.create(author=cls.author, title=f'Post {i}', content='Body') for i in range(2)]
+
+    def test_flush_adds_to_todays_rows(self):
+        counters.clear()
+        for post in (self.posts[0], self.posts[0], self.posts[1]):
+            record_view(post.pk)
+        flush_views()
+        record_view(self.posts[0].pk)
+        flush_views()
+
+        rows = DailyPostViews.objects.filter(day=timezone.localdate()).order_by('post_id')
+        self.assertEqual([(row.post_id, row.author_id, row.views) for row in rows], [
+            (self.posts[0].pk, self.author.pk, 3),
+            (self.posts[1].pk, self.author.pk, 1),
+        ])
+
+    def test_daily_and_weekly_series(self):
+        today = date(2025, 3, 12)  # a Wednesday
+        for days_ago, views in ((0, 4), (1, 2), (3, 1), (40, 7), (120, 9)):
+            DailyPostViews.objects.create(
+                post=self.posts[0], author=self.author, day=today - timedelta(days=days_ago), views=views)
+        DailyPostViews.objects.create(post=self.posts[1], author=self.author, day=today, views=5)
+
+        daily, weekly = view_history(self.author, today)
+
+        self.assertEqual(len(daily), 30)
+        self.assertEqual([point['views'] for point in daily[-4:]], [1, 0, 2, 9])
+        self.assertEqual(len(weekly), 12)
+        self.assertEqual(weekly[-1], {'label': 'Mar 10', 'views': 11})
+        self.assertEqual(weekly[-2]['views'], 1)
+        self.assertEqual(sum(point['views'] for point in weekly), 19)
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('writer', 'writer@example.com', 'password')
+        cls.reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+
+    def assertStatsInSync(self, *users):
+        for user in users:
+            stats = AuthorStats.objects.get(user=user)
+            expected = AuthorStats.compute(user.pk)
+            self.assertEqual({field: getattr(stats, field) for field in expected}, expected)
+
+    def test_signals_keep_stats_in_sync(self):
+        AuthorStats.rebuild(self.author.pk)
+        AuthorStats.rebuild(self.reader.pk)
+
+        post = Post.objects.create(author=self.author, title='Post', content='Body')
+        other = Post.objects.create(author=self.author, title='Other', content='Body')
+        comment = Comment.objects.create(user=self.reader, post=post, content='Nice')
+        Comment.objects.create(user=self.author, post=post, parent=comment, content='Thanks')
+        Comment.objects.create(user=self.reader, post=other, content='Also nice')
+        self.assertStatsInSync(self.author, self.reader)
+
+        counters.clear()
+        counters.set('post_views:flushed_recently', True)
+        record_view(post.pk)
+        record_view(post.pk)
+        flush_views()
+        self.assertStatsInSync(self.author, self.reader)
+
+        post = Post.objects.get(pk=post.pk)
+        post.is_archived = True
+        post.save(update_fields=['is_archived'])
+        self.assertStatsInSync(self.author, self.reader)
+
+        comment.delete()
+        self.assertStatsInSync(self.author, self.reader)
+
+        other.delete()
+        self.assertStatsInSync(self.author, self.reader)
+
+    def test_cascaded_comment_deletes_look_up_authors_once(self):
+        AuthorStats.rebuild(self.author.pk)
+        AuthorStats.rebuild(self.reader.pk)
+        post = Post.objects.create(author=self.author, title='Post', content='Body')
+        other = Post.objects.create(author=self.reader, title='Other', content='Body')
+        for i in range(5):
+            Comment.objects.create(user=self.reader, post=post, content=f'Comment {i}')
+            Comment.objects.create(user=self.author, post=other, content=f'Reply {i}')
+
+        def author_lookups(queries):
+            return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and '"blog_post"."author_id"' in q['sql']]
+
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        self.assertEqual(author_lookups(queries), [])
+        self.assertStatsInSync(self.author, self.reader)
+
+        with CaptureQueriesContext(connection) as queries:
+            Comment.objects.filter(post=other).delete()
+        self.assertEqual(len(author_lookups(queries)), 1)
+        self.assertStatsInSync(self.author, self.reader)
 
-# Create your tests here.
+    def test_rebuild_command(self):
+        Post.objects.create(author=self.author, title='Post', content='Body')
+        AuthorStats.objects.filter(user=self.author).update(post_count=42)
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertEqual(AuthorStats.objects.get(user=self.author).post_count, 1)
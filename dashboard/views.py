@@ -1,56 +1,95 @@
 from django.shortcuts import render
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
 from django.views import View
 from blog.models import Post
-from comments.models import Comment
+from .models import AuthorStats, DailyPostViews
 from django.utils import timezone
 from datetime import timedelta
 import calendar
 
 
+def last_months(today, count=12):
+    year, month = today.year, today.month
+    months = []
+    for _ in range(count):
+        months.append((year, month))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return months[::-1]
+
+
+def view_history(user, today, days=30, weeks=12):
+    """Return (daily, weekly) view totals for the author's posts, oldest first.
+
+    Both series come from one range scan of the (author, day) index.
+    """
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    start = min(first_week, today - timedelta(days=days - 1))
+    totals = dict(
+        DailyPostViews.objects.filter(author=user, day__gte=start)
+        .values('day')
+        .annotate(views=Sum('views'))
+        .values_list('day', 'views')
+        .order_by()
+    )
+
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = today - timedelta(days=offset)
+        daily.append({'label': day.strftime('%b %d'), 'views': totals.get(day, 0)})
+
+    weekly = []
+    for week in range(weeks):
+        monday = first_week + timedelta(weeks=week)
+        views = sum(totals.get(monday + timedelta(days=i), 0) for i in range(7))
+        weekly.append({'label': monday.strftime('%b %d'), 'views': views})
+    return daily, weekly
+
+
 class DashboardHomeView(LoginRequiredMixin, View):
     login_url = 'login'
     
     def get(self, request):
         user = request.user
-        
-        total_posts = Post.objects.filter(author=user, is_archived=False).count()
-        archived_posts = Post.objects.filter(author=user, is_archived=True).count()
-        total_comments = Comment.objects.filter(post__author=user).count()
-        total_views = sum(post.views for post in Post.objects.filter(author=user, is_archived=False))
-        
-        recent_posts = Post.objects.filter(author=user).order_by('-created_at')[:5]
-        
-        now = timezone.now()
-        monthly_data = []
-        
-        for i in range(11, -1, -1):
-            month_date = now - timedelta(days=30 * i)
-            month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            if month_date.month == 12:
-                month_end = month_start.replace(year=month_start.year + 1, month=1)
-            else:
-                month_end = month_start.replace(month=month_start.month + 1)
-            
-            count = Post.objects.filter(
-                author=user,
-                created_at__gte=month_start,
-                created_at__lt=month_end
-            ).count()
-            
-            monthly_data.append({
-                'month': calendar.month_abbr[month_start.month],
-                'count': count
-            })
-        
+        posts = Post.objects.filter(author=user)
+
+        stats = AuthorStats.for_user(user)
+
+        recent_posts = posts.only(
+            'title', 'slug', 'is_archived', 'views', 'unique_visitors', 'comment_count', 'created_at'
+        ).order_by('-created_at')[:5]
+
+        months = last_months(timezone.localdate())
+        first_year, first_month = months[0]
+        since = timezone.localtime().replace(
+            year=first_year, month=first_month, day=1, hour=0, minute=0, second=0, microsecond=0)
+        monthly_counts = {
+            (row['month'].year, row['month'].month): row['count']
+            for row in posts.filter(created_at__gte=since)
+            .annotate(month=TruncMonth('created_at'))
+            .values('month')
+            .annotate(count=Count('id'))
+            .order_by()
+        }
+        monthly_data = [
+            {'month': calendar.month_abbr[month], 'count': monthly_counts.get((year, month), 0)}
+            for year, month in months
+        ]
+
+        daily_views, weekly_views = view_history(user, timezone.localdate())
+
         context = {
-            'total_posts': total_posts,
-            'archived_posts': archived_posts,
-            'total_comments': total_comments,
-            'total_views': total_views,
+            'total_posts': stats.post_count,
+            'archived_posts': stats.archived_post_count,
+            'total_views': stats.total_views,
+            'total_comments': stats.comments_received,
             'recent_posts': recent_posts,
             'monthly_data': monthly_data,
+            'daily_views': daily_views,
+            'weekly_views': weekly_views,
         }
         
         return render(request, 'dashboard/dashboard_home.html', context)
-    
\ No newline at end of file
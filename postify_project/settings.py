@@ -115,6 +115,41 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The default local-memory cache is per process. Point CACHE_BACKEND at a
+# shared cache (e.g. django.core.cache.backends.redis.RedisCache) in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': getenv('CACHE_LOCATION', ''),
+    },
+    # Buffered view counts, visitor sketches and the flush lock. Entries here
+    # are data, not copies, so this cache must be shared by every worker and
+    # must never evict: use Redis in production. Local memory is for development
+    # only (`manage.py check --deploy` warns about it).
+    'counters': {
+        'BACKEND': getenv('COUNTER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': getenv('COUNTER_CACHE_LOCATION', 'counters'),
+    },
+}
+if CACHES['counters']['BACKEND'].endswith('LocMemCache'):
+    CACHES['counters']['OPTIONS'] = {'MAX_ENTRIES': 1_000_000}
+
+# Post view counts are buffered in the cache and written to the database
+# at most once per interval (seconds).
+POST_VIEW_FLUSH_INTERVAL = int(getenv('POST_VIEW_FLUSH_INTERVAL', '60'))
+
+# Anonymous home and blog listing pages are cached until content changes;
+# the timeout (seconds) only bounds how long an entry can live.
+PAGE_CACHE_TIMEOUT = int(getenv('PAGE_CACHE_TIMEOUT', '300'))
+
+# Largest accepted cover or avatar upload, in bytes. Uploads are stored only
+# as downscaled renditions, never as the original file.
+IMAGE_UPLOAD_MAX_SIZE = int(getenv('IMAGE_UPLOAD_MAX_SIZE', str(5 * 1024 * 1024)))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -154,6 +189,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static'
 ]
 
+# Uploaded image renditions go through the default storage backend.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = getenv('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 